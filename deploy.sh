@@ -67,6 +67,13 @@ if aws lambda get-function --function-name $FUNCTION_NAME 2>/dev/null; then
     aws lambda update-function-code \
         --function-name $FUNCTION_NAME \
         --zip-file fileb://sap-claude-handler.zip \
+        --architectures arm64 \
+        --no-cli-pager > /dev/null
+    # コード更新の完了を待ってからメモリ設定を反映（1769MBで1 vCPU全体を使用）
+    aws lambda wait function-updated --function-name $FUNCTION_NAME
+    aws lambda update-function-configuration \
+        --function-name $FUNCTION_NAME \
+        --memory-size 1769 \
         --no-cli-pager > /dev/null
     success "$FUNCTION_NAME の更新完了"
 else
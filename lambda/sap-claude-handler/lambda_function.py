@@ -1,9 +1,37 @@
 # lambda_function.py
-# Stable, no external deps. Reads salesData (array) or csv (string). Bedrock converse. CORS/OPTIONS ready.
-
-import json, os, base64, logging, boto3, urllib.request, urllib.parse
-from collections import Counter, defaultdict
-from typing import Any, Dict, List, Optional, Tuple
+# Stable, no required external deps (pandas/orjson optional). Reads salesData (array) or csv (string). Bedrock converse. CORS/OPTIONS ready.
+
+import json, os, re, time, binascii, logging, asyncio, heapq, csv, io, functools, importlib.util, hashlib, threading, tempfile, gzip, boto3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter, methodcaller
+from botocore.config import Config
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+# 大量データ集計の高速化用（Lambdaレイヤーにある場合のみ使用）
+# importが重くコールドスタートを延ばすため、ここでは存在確認のみ行い初回使用時に読み込む
+_HAS_PANDAS = importlib.util.find_spec("pandas") is not None
+pd = None
+
+def _get_pandas():
+    global pd
+    if pd is None:
+        import pandas as pd
+    return pd
+
+# JSONシリアライズの高速化用（無い場合は標準jsonを使用）
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
+# データタイプ判定のキーワード走査用（無い場合は標準ライブラリで判定）
+try:
+    import ahocorasick
+    _HAS_AHOCORASICK = True
+except ImportError:
+    _HAS_AHOCORASICK = False
 
 # ====== ENV ======
 MODEL_ID       = os.environ.get("BEDROCK_MODEL_ID", "us.deepseek.r1-v1:0")
@@ -12,11 +40,100 @@ DEFAULT_FORMAT = (os.environ.get("DEFAULT_FORMAT", "json") or "json").lower()  #
 MAX_TOKENS     = int(os.environ.get("MAX_TOKENS", "8000"))  # 戦略レベル分析用に大幅増加
 TEMPERATURE    = float(os.environ.get("TEMPERATURE", "0.15"))
 LINE_NOTIFY_TOKEN = os.environ.get("LINE_NOTIFY_TOKEN", "")
+FORCE_JA       = os.environ.get("FORCE_JA", "false").lower() in ("1", "true")
+# 複数ページPDF・同期API上限超えの書類をTextract非同期API(S3経由)で処理する場合のバケット（未設定なら同期APIのみ）
+TEXTRACT_S3_BUCKET = os.environ.get("TEXTRACT_S3_BUCKET", "")
+DEBUG_ECHO     = os.environ.get("LAMBDA_DEBUG_ECHO") in ("1", "true", "TRUE")
+# Converse APIのcachePointに対応したモデルのみプロンプトキャッシュを使用（非対応モデルはValidationException）
+PROMPT_CACHE   = any(tag in MODEL_ID for tag in ("claude-3-5", "claude-3-7", "claude-sonnet-4", "claude-opus-4", "amazon.nova"))
+# JSON形式の分析をセクション別プロンプトに分割して並列実行（呼び出し回数が増えるため既定は無効）
+SPLIT_SECTIONS = os.environ.get("SPLIT_SECTIONS", "false").lower() in ("1", "true")
+# converse_streamで生成結果を逐次受信（bedrock:InvokeModelWithResponseStream権限が必要）
+BEDROCK_STREAM = os.environ.get("BEDROCK_STREAM", "false").lower() in ("1", "true")
+# Sentry webhookへの応答をLINE送信完了まで待たない（凍結中は送信が次回起動まで遅れ得るため既定は無効）
+LINE_ASYNC_NOTIFY = os.environ.get("LINE_ASYNC_NOTIFY", "false").lower() in ("1", "true")
+# Accept-Encodingにgzipを含むリクエストへ圧縮レスポンスを返す（API Gateway経由の場合はbinaryMediaTypes設定が必要なため既定は無効）
+GZIP_RESPONSES = os.environ.get("GZIP_RESPONSES", "false").lower() in ("1", "true")
+# プロンプトに埋め込むデータ量の上限（入力トークン・レイテンシ抑制）
+MAX_SAMPLE_ROWS   = int(os.environ.get("MAX_SAMPLE_ROWS", "30"))
+MAX_PROMPT_DAYS   = 90    # 時系列は直近N日分のみプロンプトに渡す
+MAX_SAMPLE_VALUE_LEN = 200  # これを超える長文セルはサンプルから除外
+MAX_ROWS          = int(os.environ.get("MAX_ROWS", "100000"))  # これを超える行数は集計・AI分析の前に拒否
+
+# ====== AWS Clients (コンテナ単位で再利用) ======
+# adaptiveリトライでスロットリング時にクライアント側で送信レートを抑制
+_CLIENT_CONFIG = Config(
+    retries={"max_attempts": 3, "mode": "adaptive"},
+    connect_timeout=2, read_timeout=15, tcp_keepalive=True, max_pool_connections=10
+)
+# Bedrockは長文生成で応答に時間がかかるため読み取りタイムアウトを延長し、リトライは1回まで
+_BEDROCK_CONFIG = _CLIENT_CONFIG.merge(Config(retries={"max_attempts": 2, "mode": "adaptive"}, read_timeout=60))
+
+# 認証情報・エンドポイント解決を共有するセッション（boto3既定セッションはスレッド間での生成が安全でない）
+_SESSION = boto3.session.Session(region_name=REGION)
+_CLIENT_LOCK = threading.Lock()  # ワーカースレッドからの遅延生成を1回に限定
+
+BEDROCK_CLIENT = _SESSION.client("bedrock-runtime", config=_BEDROCK_CONFIG)
+TEXTRACT_CLIENT = None  # 画像分析時のみ使用するため初回呼び出しで生成
+S3_CLIENT = None  # Textract非同期API用（TEXTRACT_S3_BUCKET設定時のみ）
+_EXECUTOR = ThreadPoolExecutor(max_workers=4)  # boto3の同期I/Oを並列化するためのワーカー
+_BG_EXECUTOR = ThreadPoolExecutor(max_workers=2)  # 応答を待たせない通知送信用
+
+def _get_textract_client():
+    global TEXTRACT_CLIENT
+    if TEXTRACT_CLIENT is None:
+        with _CLIENT_LOCK:
+            if TEXTRACT_CLIENT is None:
+                TEXTRACT_CLIENT = _SESSION.client("textract", config=_CLIENT_CONFIG)
+    return TEXTRACT_CLIENT
+
+def _get_s3_client():
+    global S3_CLIENT
+    if S3_CLIENT is None:
+        with _CLIENT_LOCK:
+            if S3_CLIENT is None:
+                S3_CLIENT = _SESSION.client("s3", config=_CLIENT_CONFIG)
+    return S3_CLIENT
+
+def _warm_connections() -> None:
+    """Bedrock/TextractへのTLS接続を事前に確立（軽量な一覧APIを呼ぶ。権限エラーでも接続はプールに残る）"""
+    for warm in (lambda: BEDROCK_CLIENT.list_async_invokes(maxResults=1),
+                 lambda: _get_textract_client().list_adapters(MaxResults=1)):
+        try:
+            warm()
+        except Exception:
+            pass
+
+# プロビジョンド同時実行のINITはリクエストの待ち時間に含まれないため、ここで接続を温めておく
+# （オンデマンドは初回リクエストの待ち時間が増えるだけ、SnapStartはスナップショット復元後にソケットが無効になるため行わない）
+if os.environ.get("AWS_LAMBDA_INITIALIZATION_TYPE") == "provisioned-concurrency":
+    _warm_connections()
 
 # ====== LOG ======
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# ====== JSON ======
+def _dumps(obj: Any) -> str:
+    """日本語をエスケープせずにJSON文字列化（orjsonがあれば使用）"""
+    if _HAS_ORJSON:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:
+            pass  # 64bitを超える整数などorjson非対応の値は標準jsonで処理
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+def _loads(raw: Union[str, bytes]) -> Any:
+    """JSONを解析（orjsonがあれば使用し、NaN等の非標準値で失敗した場合は標準jsonで再解析）"""
+    if _HAS_ORJSON:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    if isinstance(raw, bytes):
+        raw = raw.decode("utf-8", errors="ignore")
+    return json.loads(raw)
+
 # ====== CORS/Response ======
 def response_json(status: int, body: Dict[str, Any]) -> Dict[str, Any]:
     # Lambda Function URLのCORS設定を使用するため、Lambdaではヘッダー設定しない
@@ -25,27 +142,48 @@ def response_json(status: int, body: Dict[str, Any]) -> Dict[str, Any]:
         "headers": {
             "Content-Type": "application/json; charset=utf-8"
         },
-        "body": json.dumps(body, ensure_ascii=False)
+        "body": _dumps(body)
+    }
+
+_GZIP_MIN_BYTES = 1024  # これ未満は圧縮・Base64化のオーバーヘッドの方が大きい
+
+def _gzip_response(resp: Dict[str, Any], accept_encoding: str) -> Dict[str, Any]:
+    """GZIP_RESPONSES有効時、クライアントがgzipを受け付ければ大きなレスポンス本文を圧縮してBase64で返す"""
+    body = resp.get("body")
+    if not GZIP_RESPONSES or resp.get("isBase64Encoded") or not isinstance(body, str) or "gzip" not in accept_encoding.lower():
+        return resp
+    raw = body.encode("utf-8")
+    if len(raw) < _GZIP_MIN_BYTES:
+        return resp
+    headers = dict(resp.get("headers") or {})
+    headers["Content-Encoding"] = "gzip"
+    headers["Vary"] = "Accept-Encoding"
+    return {
+        **resp,
+        "headers": headers,
+        "isBase64Encoded": True,
+        "body": binascii.b2a_base64(gzip.compress(raw, compresslevel=6), newline=False).decode("ascii")
     }
 
 # ====== Debug early echo (enable with LAMBDA_DEBUG_ECHO=1 or ?echo=1) ======
+_ECHO_BYTES = 4000
+_ECHO_B64_CHARS = _ECHO_BYTES // 3 * 4 + 4
+
 def _early_echo(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     try:
         qs = (event.get("rawQueryString") or "").lower()
-        env_on = os.environ.get("LAMBDA_DEBUG_ECHO") in ("1", "true", "TRUE")
-        if not (env_on or ("echo=1" in qs)):
+        if not (DEBUG_ECHO or ("echo=1" in qs)):
             return None
         body_raw = event.get("body")
+        # 表示するのは先頭1000文字のみなので、本文全体ではなく必要な先頭部分だけをデコード
+        # （UTF-8は1文字最大4バイト → 4000バイト分 = base64で5336文字）
         if event.get("isBase64Encoded") and isinstance(body_raw, str):
             try:
-                body_raw = base64.b64decode(body_raw).decode("utf-8-sig")
+                body_raw = binascii.a2b_base64(body_raw[:_ECHO_B64_CHARS]).decode("utf-8-sig", errors="ignore")
             except Exception:
                 body_raw = "<base64 decode error>"
         elif isinstance(body_raw, (bytes, bytearray)):
-            try:
-                body_raw = body_raw.decode("utf-8-sig")
-            except Exception:
-                body_raw = body_raw.decode("utf-8", errors="ignore")
+            body_raw = bytes(body_raw[:_ECHO_BYTES]).decode("utf-8-sig", errors="ignore")
         sample = body_raw[:1000] if isinstance(body_raw, str) else str(type(body_raw))
         return response_json(200, {
             "message": "DEBUG",
@@ -62,56 +200,148 @@ def _early_echo(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         return None
 
 # ====== Helpers ======
+_CURRENCY_TRANS = str.maketrans("", "", ",¥円")  # 前後の空白はfloat()が無視する（値の途中の空白は除去しない）
+_DATE_TRANS = str.maketrans("/", "-")
+
 def _to_number(x: Any) -> float:
+    t = type(x)
+    if t is float or t is int:  # JSONの数値はそのまま（boolは除外）
+        try:
+            return float(x)
+        except OverflowError:
+            pass  # floatの範囲を超える整数は従来どおり文字列経由で変換（inf）
     try:
-        s = str(x).replace(",", "").replace("¥", "").replace("円", "").strip()
-        return float(s)
+        return float(str(x).translate(_CURRENCY_TRANS))
     except Exception:
         return 0.0
 
 def _detect_columns(rows: List[Dict[str, Any]]) -> Dict[str, str]:
+    return _detect_columns_by_headers(tuple(rows[0].keys())) if rows else {}
+
+# 列の役割ごとのキーワード（1列につき役割ごとに1回の正規表現走査）
+_COLUMN_ROLE_PATTERNS = (
+    ("date", re.compile("日|date")),
+    # 金額系の列を幅広く検出
+    ("sales", re.compile("売|金額|amount|sales|total|給与|salary|roi|予算")),
+    # 名前系の列を幅広く検出
+    ("product", re.compile("商|品|product|item|name|氏名|社員|employee|キャンペーン")),
+)
+
+# 同じフォーマットの再アップロード（月次レポート等）はウォームコンテナでキャッシュヒット
+# 戻り値は共有されるため呼び出し側で変更しないこと
+@functools.lru_cache(maxsize=256)
+def _detect_columns_by_headers(headers: Tuple[str, ...]) -> Dict[str, str]:
     colmap: Dict[str, str] = {}
-    if not rows:
-        return colmap
-    for c in rows[0].keys():
+    for c in headers:
         name = str(c)
-        lc = name.lower()
-        if ("日" in name) or ("date" in lc):
-            colmap.setdefault("date", name)
-        # 金額系の列を幅広く検出
-        if (("売" in name) or ("金額" in name) or ("amount" in lc) or ("sales" in lc) or ("total" in lc) or
-            ("給与" in name) or ("salary" in lc) or ("在庫金額" in name) or ("roi" in lc) or ("予算" in name)):
-            colmap.setdefault("sales", name)
-        # 名前系の列を幅広く検出
-        if (("商" in name) or ("品" in name) or ("product" in lc) or ("item" in lc) or ("name" in lc) or
-            ("氏名" in name) or ("社員" in name) or ("employee" in lc) or ("キャンペーン" in name) or ("商品コード" in name)):
-            colmap.setdefault("product", name)
+        lc = name.lower()  # 日本語のキーワードは小文字化の影響を受けないため小文字化した列名で一括判定
+        for role, pattern in _COLUMN_ROLE_PATTERNS:
+            if role not in colmap and pattern.search(lc):
+                colmap[role] = name
     return colmap
 
-def _compute_stats(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+def _sanitize_colmap(raw: Any, columns: Sequence[str]) -> Optional[Dict[str, str]]:
+    """フロントエンド指定の列マッピング（date/sales/product）から実在する列のみ採用し、
+    指定のない役割は列名からの自動検出で補完。無効ならNone"""
+    if not isinstance(raw, dict):
+        return None
+    known = set(columns)
+    colmap = {k: v for k, v in raw.items() if k in ("date", "sales", "product") and isinstance(v, str) and v in known}
+    if not colmap:
+        return None
+    # 自動検出結果はキャッシュで共有されるため、コピーに指定分を上書きする
+    detected = dict(_detect_columns_by_headers(tuple(columns)))
+    detected.update(colmap)
+    return detected
+
+# pandas集計を使う最小行数（0で無効）。JSON由来のPythonオブジェクト列では文字列処理が
+# 行ごとのPython呼び出しになるため、計測上はどの行数でも純Pythonループの方が速く既定は無効
+_PANDAS_MIN_ROWS = int(os.environ.get("PANDAS_MIN_ROWS", "0"))
+
+_Getter = Optional[Callable[[Any], Any]]
+
+def _column_getter(col: Optional[str], headers: Optional[Sequence[str]], default: Any) -> _Getter:
+    """行から列の値を取り出すC実装の関数（dict行はget、タプル行はインデックス参照）"""
+    if not col:
+        return None
+    if headers is None:
+        return methodcaller("get", col, default)
+    # dict(zip(headers, row))と同じく、重複した列名は後ろの列を採用
+    index = {h: i for i, h in enumerate(headers)}[col]
+    return itemgetter(index)
+
+def _compute_stats_pandas(rows: Sequence[Any], get_d: _Getter, get_s: _Getter, get_p: _Getter) -> Dict[str, Any]:
+    """_compute_statsのpandas版（必要な列だけSeries化して集計）"""
+    pd = _get_pandas()
+    total = len(rows)
+    if get_s:
+        sales = pd.to_numeric(
+            pd.Series([get_s(r) for r in rows], dtype=object).astype(str).str.replace(r"[,¥円]", "", regex=True).str.strip(),
+            errors="coerce"
+        ).fillna(0.0)
+    else:
+        sales = pd.Series(0.0, index=range(total))
+    total_sales = float(sales.sum())
+
+    top_products = []
+    if get_p:
+        names = pd.Series([get_p(r) for r in rows], dtype=object).astype(str).str.strip()
+        by_product = sales.groupby(names, sort=False).sum().nlargest(5)
+        top_products = [{"name": k, "sales": float(v)} for k, v in by_product.items()]
+
+    trend = []
+    if get_d:
+        days = pd.Series([get_d(r) for r in rows], dtype=object).astype(str).str.strip().str.replace("/", "-", regex=False).str.slice(0, 10)
+        mask = days != ""
+        by_day = sales[mask].groupby(days[mask]).sum().sort_index()
+        trend = [{"date": d, "sales": float(v)} for d, v in by_day.items()]
+
+    return {
+        "total_rows": total,
+        "total_sales": total_sales,
+        "avg_row_sales": float(total_sales / total),
+        "top_products": top_products,
+        "timeseries": trend
+    }
+
+def _compute_stats(rows: Sequence[Any], headers: Optional[Sequence[str]] = None,
+                   colmap: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """rowsはdictのリスト、またはheaders指定時はCSVのタプル行。colmap指定時は列の自動検出を省略"""
     total = len(rows)
     if total == 0:
         return {"total_rows": 0, "total_sales": 0.0, "avg_row_sales": 0.0, "top_products": [], "timeseries": []}
 
-    colmap = _detect_columns(rows)
-    dcol, scol, pcol = colmap.get("date"), colmap.get("sales"), colmap.get("product")
+    if colmap is None:
+        colmap = _detect_columns_by_headers(tuple(headers)) if headers is not None else _detect_columns(rows)
+    get_d = _column_getter(colmap.get("date"), headers, "")
+    get_s = _column_getter(colmap.get("sales"), headers, 0)
+    get_p = _column_getter(colmap.get("product"), headers, "")
+
+    if _HAS_PANDAS and _PANDAS_MIN_ROWS and total >= _PANDAS_MIN_ROWS:
+        return _compute_stats_pandas(rows, get_d, get_s, get_p)
 
-    ts = defaultdict(float)
-    by_product: Counter = Counter()
+    ts: Dict[str, float] = {}
+    by_product: Dict[str, float] = {}
     total_sales = 0.0
+    to_number = _to_number
+    trimmed = headers is not None  # CSVのセルは_parse_csv_tableでstrip済み
 
     for r in rows:
-        v = _to_number(r.get(scol, 0)) if scol else 0.0
+        v = to_number(get_s(r)) if get_s else 0.0
         total_sales += v
-        if pcol:
-            by_product[str(r.get(pcol, "")).strip()] += v
-        if dcol:
-            dt = str(r.get(dcol, "")).strip().replace("/", "-")
-            day = dt[:10] if len(dt) >= 10 else dt
-            if day:
-                ts[day] += v
-
-    top_products = [{"name": k, "sales": float(v)} for k, v in by_product.most_common(5)]
+        if get_p:
+            name = str(get_p(r)).strip()
+            by_product[name] = by_product.get(name, 0.0) + v
+        if get_d:
+            d = get_d(r)
+            if d != "":
+                if type(d) is not str:
+                    d = str(d)
+                day = (d if trimmed else d.strip()).translate(_DATE_TRANS)[:10]
+                if day:
+                    ts[day] = ts.get(day, 0.0) + v
+
+    top_products = [{"name": k, "sales": float(v)} for k, v in heapq.nlargest(5, by_product.items(), key=itemgetter(1))]
     trend = [{"date": d, "sales": float(v)} for d, v in sorted(ts.items())]
     avg = float(total_sales / total) if total else 0.0
 
@@ -123,28 +353,60 @@ def _compute_stats(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
         "timeseries": trend
     }
 
-def _build_prompt_json(stats: Dict[str, Any], sample: List[Dict[str, Any]], data_type: str = "sales_data", industry: str = "general") -> str:
-    schema_hint = {
-        "type": "object",
-        "properties": {
-            "overview": {"type": "string"},
-            "findings": {"type": "array", "items": {"type": "string"}},
-            "kpis": {
-                "type": "object",
-                "properties": {
-                    "total_sales": {"type": "number"},
-                    "top_products": {
-                        "type": "array",
-                        "items": {"type": "object", "properties": {"name": {"type": "string"}, "sales": {"type": "number"}}}
-                    }
+def _sample_rows(rows: Sequence[Any], cap: int) -> List[Any]:
+    """先頭・中央・末尾から層別に最大cap行を抽出（期間の偏りを抑える）。先頭行は常に含む"""
+    n = len(rows)
+    if n <= cap:
+        return list(rows)
+    if cap <= 0:
+        return []
+    head = max(1, cap * 2 // 5)
+    tail = min(cap * 2 // 5, cap - head)
+    mid = cap - head - tail
+    mid_start = (n - mid) // 2
+    return list(rows[:head]) + list(rows[mid_start:mid_start + mid]) + list(rows[n - tail:])
+
+def _prompt_inputs(stats: Dict[str, Any], sample: List[Any]) -> Tuple[Dict[str, Any], List[Any]]:
+    """プロンプト埋め込み用に統計・サンプルを縮小（レスポンス側のstatsは変更しない）"""
+    if len(stats.get("timeseries", [])) > MAX_PROMPT_DAYS:
+        stats = {**stats, "timeseries": stats["timeseries"][-MAX_PROMPT_DAYS:]}
+    trimmed = []
+    for r in sample[:MAX_SAMPLE_ROWS]:
+        if isinstance(r, dict):
+            r = {k: v for k, v in r.items() if not (isinstance(v, str) and len(v) > MAX_SAMPLE_VALUE_LEN)}
+        trimmed.append(r)
+    return stats, trimmed
+
+# JSON出力スキーマ（定数のため文字列化はimport時に1回のみ）
+_SCHEMA_HINT = {
+    "type": "object",
+    "properties": {
+        "overview": {"type": "string"},
+        "findings": {"type": "array", "items": {"type": "string"}},
+        "kpis": {
+            "type": "object",
+            "properties": {
+                "total_sales": {"type": "number"},
+                "top_products": {
+                    "type": "array",
+                    "items": {"type": "object", "properties": {"name": {"type": "string"}, "sales": {"type": "number"}}}
                 }
-            },
-            "trend": {"type": "array", "items": {"type": "object", "properties": {"date": {"type": "string"}, "sales": {"type": "number"}}}},
-            "action_plan": {"type": "array", "items": {"type": "string"}}
+            }
         },
-        "required": ["overview", "findings", "kpis", "action_plan"]
-    }
+        "trend": {"type": "array", "items": {"type": "object", "properties": {"date": {"type": "string"}, "sales": {"type": "number"}}}},
+        "action_plan": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["overview", "findings", "kpis", "action_plan"]
+}
+_SCHEMA_JSON_STR = _dumps(_SCHEMA_HINT)
+
+_PROMPT_JSON_SUFFIX = """
 
+※このレポートは経営陣が読んだ翌日から実行に移せる実用性を最優先してください。"""
+
+@functools.lru_cache(maxsize=64)
+def _build_prompt_json_prefix(data_type: str = "sales_data", industry: str = "general") -> str:
+    """リクエスト間で変化しない指示部分（プロンプトキャッシュの対象）。(data_type, industry)ごとに1回だけ組み立てる"""
     # 業種別・データタイプ別の専門的分析指示
     analysis_instructions = _get_industry_specific_instructions(data_type, industry)
     data_type_name = _get_data_type_name(data_type)
@@ -200,16 +462,17 @@ def _build_prompt_json(stats: Dict[str, Any], sample: List[Dict[str, Any]], data
 ✓ 責任者・期限・KPIを明確化
 ✓ ROI（投資対効果）を金額で明示
 
-JSON形式で出力: {json.dumps(schema_hint, ensure_ascii=False)}
+JSON形式で出力: {_SCHEMA_JSON_STR}
 
-【分析データ】
-統計サマリー: {json.dumps(stats, ensure_ascii=False)}
-サンプルデータ: {json.dumps(sample, ensure_ascii=False)}
+"""
 
-※このレポートは経営陣が読んだ翌日から実行に移せる実用性を最優先してください。"""
+def _build_prompt_json(stats: Dict[str, Any], sample: List[Dict[str, Any]], data_type: str = "sales_data", industry: str = "general") -> str:
+    # 固定部分は(data_type, industry)ごとにキャッシュ済み。可変部分とは1回のjoinで連結（数KBの固定文をコピーし直さない）
+    return "".join((_build_prompt_json_prefix(data_type, industry), "【分析データ】\n統計サマリー: ", _dumps(stats),
+                    "\nサンプルデータ: ", _dumps(sample), _PROMPT_JSON_SUFFIX))
 
-def _build_prompt_markdown(stats: Dict[str, Any], sample: List[Dict[str, Any]], data_type: str = "sales_data") -> str:
-    return f"""あなたは会社の売上データを分析するビジネスアドバイザーです。以下の売上データを見て、社長や部長が読むレポートを、完全に日本語と数字だけで作成してください。
+# markdown/text形式プロンプトの固定部分（統計・サンプルの見出しまで）
+_PROMPT_MARKDOWN_HEAD = """あなたは会社の売上データを分析するビジネスアドバイザーです。以下の売上データを見て、社長や部長が読むレポートを、完全に日本語と数字だけで作成してください。
 
 【重要】
 - Markdownや記号は一切使わず、普通の日本語文章で書いてください
@@ -219,14 +482,10 @@ def _build_prompt_markdown(stats: Dict[str, Any], sample: List[Dict[str, Any]],
 - 数字は「○○万円」「○○%増加」など、日本人が話すときの表現で書いてください
 
 # 統計要約
-{json.dumps(stats, ensure_ascii=False)}
-
-# サンプル（最大50）
-{json.dumps(sample, ensure_ascii=False)}
 """
+_PROMPT_MARKDOWN_SAMPLE = f"\n\n# サンプル（最大{MAX_SAMPLE_ROWS}）\n"
 
-def _build_prompt_text(stats: Dict[str, Any], sample: List[Dict[str, Any]], data_type: str = "sales_data") -> str:
-    return f"""あなたは会社の売上データを分析するビジネスアドバイザーです。以下の売上データを見て、上司に口頭で報告するように、完全に日本語だけで3行以内にまとめてください。
+_PROMPT_TEXT_HEAD = """あなたは会社の売上データを分析するビジネスアドバイザーです。以下の売上データを見て、上司に口頭で報告するように、完全に日本語だけで3行以内にまとめてください。
 
 【絶対守ること】
 - 記号、英語、カタカナ専門用語は一切使わないでください
@@ -235,30 +494,84 @@ def _build_prompt_text(stats: Dict[str, Any], sample: List[Dict[str, Any]], data
 - 「です・ます」調で、丁寧に書いてください
 
 [統計要約]
-{json.dumps(stats, ensure_ascii=False)}
-
-[サンプル（最大50）]
-{json.dumps(sample, ensure_ascii=False)}
 """
+_PROMPT_TEXT_SAMPLE = f"\n\n[サンプル（最大{MAX_SAMPLE_ROWS}）]\n"
 
-def _parse_csv_simple(csv_text: str) -> List[Dict[str, Any]]:
-    lines = [l for l in csv_text.splitlines() if l.strip() != ""]
-    if not lines: return []
-    headers = [h.strip() for h in lines[0].split(",")]
-    rows: List[Dict[str, Any]] = []
-    for line in lines[1:]:
-        cells = [c.strip() for c in line.split(",")]
-        row = {}
-        for i, h in enumerate(headers):
-            row[h] = cells[i] if i < len(cells) else ""
-        rows.append(row)
-    return rows
-
-def _identify_data_type(columns: List[str], sample_data: List[Dict[str, Any]]) -> str:
-    """データの列名とサンプルから財務データの種類を自動判別（7つの分析タイプに特化）"""
-    if not columns:
-        return "financial_data"
-    
+def _build_prompt_markdown(stats: Dict[str, Any], sample: List[Dict[str, Any]], data_type: str = "sales_data") -> str:
+    return "".join((_PROMPT_MARKDOWN_HEAD, _dumps(stats), _PROMPT_MARKDOWN_SAMPLE, _dumps(sample), "\n"))
+
+def _build_prompt_text(stats: Dict[str, Any], sample: List[Dict[str, Any]], data_type: str = "sales_data") -> str:
+    return "".join((_PROMPT_TEXT_HEAD, _dumps(stats), _PROMPT_TEXT_SAMPLE, _dumps(sample), "\n"))
+
+def _parse_csv_table(csv_text: str) -> Tuple[Tuple[str, ...], List[Tuple[str, ...]]]:
+    """CSVを(ヘッダー, タプル行のリスト)に変換。行ごとのdictを作らないため大きなCSVでも省メモリ"""
+    # 標準csvモジュール（C実装）でクォート・セル内カンマ/改行にも対応
+    headers: Tuple[str, ...] = ()
+    rows: List[Tuple[str, ...]] = []
+    for cells in csv.reader(io.StringIO(csv_text)):
+        if not cells or (len(cells) == 1 and not cells[0].strip()):
+            continue  # 空行はスキップ
+        cells = [c.strip() for c in cells]
+        if not headers:
+            headers = tuple(cells)
+            continue
+        if len(cells) < len(headers):
+            cells.extend([""] * (len(headers) - len(cells)))
+        rows.append(tuple(cells))
+    return headers, rows
+
+def _rows_to_dicts(headers: Sequence[str], rows: Sequence[Tuple[str, ...]]) -> List[Dict[str, Any]]:
+    return [dict(zip(headers, row)) for row in rows]
+
+# 列名キーワードによるデータタイプ判定テーブル: (データタイプ, スコア, キーワード)
+# 列名にキーワードが含まれていれば（出現回数によらず）1回加点する
+_COLUMN_KEYWORD_TABLE = (
+    # 人事データの強いキーワード（高スコア）
+    ("hr_data", 3, ("社員id", "employee", "氏名", "部署", "給与", "salary", "賞与", "年収", "評価", "performance", "残業", "overtime", "有給", "離職", "昇進", "スキル", "チーム貢献", "人事")),
+    # 人事データの中程度キーワード
+    ("hr_data", 2, ("勤怠", "attendance", "研修", "training", "目標達成", "職位", "入社", "年齢")),
+    # マーケティングデータの強いキーワード
+    ("marketing_data", 3, ("キャンペーン", "campaign", "roi", "インプレッション", "impression", "クリック", "click", "cv数", "conversion", "顧客獲得", "cac", "roas", "広告", "媒体", "ターゲット")),
+    # マーケティングデータの中程度キーワード
+    ("marketing_data", 1, ("予算", "budget", "支出", "cost", "facebook", "google", "youtube", "instagram", "tiktok", "twitter")),
+    # 売上データの強いキーワード
+    ("sales_data", 3, ("売上", "sales", "revenue", "商品", "product", "顧客", "customer", "金額", "amount", "単価", "price", "数量", "quantity")),
+    # 売上データの中程度キーワード
+    ("sales_data", 1, ("日付", "date", "店舗", "store", "地域", "region", "カテゴリ", "category")),
+    # 統合戦略データ（財務データ）の強いキーワード
+    ("financial_data", 3, ("売上高", "revenue", "利益", "profit", "資産", "asset", "負債", "liability", "キャッシュ", "cash", "損益", "pl", "貸借", "bs")),
+    # 在庫分析データの強いキーワード
+    ("inventory_data", 3, ("在庫", "inventory", "stock", "在庫数", "保有数", "倉庫", "warehouse", "回転率", "turnover", "滞留", "入庫", "出庫", "調達", "procurement")),
+    # 在庫分析データの中程度キーワード
+    ("inventory_data", 1, ("商品コード", "sku", "ロット", "lot", "品番", "型番", "仕入", "supplier", "発注", "order", "納期", "delivery")),
+    # 顧客分析データの強いキーワード
+    ("customer_data", 3, ("顧客", "customer", "会員", "member", "ユーザー", "user", "ltv", "lifetime", "churn", "離脱", "継続", "retention", "満足度", "satisfaction")),
+    # 顧客分析データの中程度キーワード
+    ("customer_data", 1, ("セグメント", "segment", "年齢", "age", "性別", "gender", "地域", "region", "購入履歴", "purchase", "アクセス", "access", "クリック", "click")),
+)
+
+# キーワード -> [(データタイプ, スコア)]（同じキーワードが複数タイプに属する場合あり）
+_KEYWORD_SCORES: Dict[str, List[Tuple[str, int]]] = {}
+for _data_type, _score, _keywords in _COLUMN_KEYWORD_TABLE:
+    for _kw in _keywords:
+        _KEYWORD_SCORES.setdefault(_kw, []).append((_data_type, _score))
+
+# pyahocorasickがあれば全キーワードを1回の走査で検出する
+if _HAS_AHOCORASICK:
+    _KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _kw in _KEYWORD_SCORES:
+        _KEYWORD_AUTOMATON.add_word(_kw, _kw)
+    _KEYWORD_AUTOMATON.make_automaton()
+
+def _match_column_keywords(col_str: str) -> set:
+    """col_strに含まれる判定キーワードの集合を返す"""
+    if _HAS_AHOCORASICK:
+        return {kw for _, kw in _KEYWORD_AUTOMATON.iter(col_str)}
+    return {kw for kw in _KEYWORD_SCORES if kw in col_str}
+
+@functools.lru_cache(maxsize=256)
+def _score_columns(columns: Tuple[str, ...]) -> Tuple[Tuple[str, int], ...]:
+    """列名だけで決まるデータタイプ別スコア（ヘッダー単位でキャッシュ）"""
     # 列名を小文字に変換して判別しやすくする
     col_lower = [col.lower() for col in columns]
     col_str = " ".join(col_lower) + " " + " ".join(columns)
@@ -273,71 +586,36 @@ def _identify_data_type(columns: List[str], sample_data: List[Dict[str, Any]]) -
         "customer_data": 0
     }
     
-    # 人事データの強いキーワード（高スコア）
-    hr_strong_keywords = ["社員id", "employee", "氏名", "部署", "給与", "salary", "賞与", "年収", "評価", "performance", "残業", "overtime", "有給", "離職", "昇進", "スキル", "チーム貢献", "人事"]
-    for keyword in hr_strong_keywords:
-        if keyword in col_str:
-            scores["hr_data"] += 3
-    
-    # 人事データの中程度キーワード
-    hr_medium_keywords = ["勤怠", "attendance", "研修", "training", "目標達成", "職位", "入社", "年齢"]
-    for keyword in hr_medium_keywords:
-        if keyword in col_str:
-            scores["hr_data"] += 2
-    
-    # マーケティングデータの強いキーワード
-    marketing_strong_keywords = ["キャンペーン", "campaign", "roi", "インプレッション", "impression", "クリック", "click", "cv数", "conversion", "顧客獲得", "cac", "roas", "広告", "媒体", "ターゲット"]
-    for keyword in marketing_strong_keywords:
-        if keyword in col_str:
-            scores["marketing_data"] += 3
-    
-    # マーケティングデータの中程度キーワード
-    marketing_medium_keywords = ["予算", "budget", "支出", "cost", "facebook", "google", "youtube", "instagram", "tiktok", "twitter"]
-    for keyword in marketing_medium_keywords:
-        if keyword in col_str:
-            scores["marketing_data"] += 1
-    
-    # 売上データの強いキーワード
-    sales_strong_keywords = ["売上", "sales", "revenue", "商品", "product", "顧客", "customer", "金額", "amount", "単価", "price", "数量", "quantity"]
-    for keyword in sales_strong_keywords:
-        if keyword in col_str:
-            scores["sales_data"] += 3
-    
-    # 売上データの中程度キーワード
-    sales_medium_keywords = ["日付", "date", "店舗", "store", "地域", "region", "カテゴリ", "category"]
-    for keyword in sales_medium_keywords:
-        if keyword in col_str:
-            scores["sales_data"] += 1
-    
-    # 統合戦略データ（財務データ）の強いキーワード
-    financial_strong_keywords = ["売上高", "revenue", "利益", "profit", "資産", "asset", "負債", "liability", "キャッシュ", "cash", "損益", "pl", "貸借", "bs"]
-    for keyword in financial_strong_keywords:
-        if keyword in col_str:
-            scores["financial_data"] += 3
-    
-    # 在庫分析データの強いキーワード
-    inventory_strong_keywords = ["在庫", "inventory", "stock", "在庫数", "保有数", "倉庫", "warehouse", "回転率", "turnover", "滞留", "入庫", "出庫", "調達", "procurement"]
-    for keyword in inventory_strong_keywords:
-        if keyword in col_str:
-            scores["inventory_data"] += 3
-    
-    # 在庫分析データの中程度キーワード
-    inventory_medium_keywords = ["商品コード", "sku", "ロット", "lot", "品番", "型番", "仕入", "supplier", "発注", "order", "納期", "delivery"]
-    for keyword in inventory_medium_keywords:
-        if keyword in col_str:
-            scores["inventory_data"] += 1
-    
-    # 顧客分析データの強いキーワード  
-    customer_strong_keywords = ["顧客", "customer", "会員", "member", "ユーザー", "user", "ltv", "lifetime", "churn", "離脱", "継続", "retention", "満足度", "satisfaction"]
-    for keyword in customer_strong_keywords:
-        if keyword in col_str:
-            scores["customer_data"] += 3
+    # 列名キーワードによるスコア加算
+    for keyword in _match_column_keywords(col_str):
+        for data_type, score in _KEYWORD_SCORES[keyword]:
+            scores[data_type] += score
+    return tuple(scores.items())
+
+def _keyword_re(keywords: Sequence[str]) -> "re.Pattern[str]":
+    """キーワードのいずれかを部分一致で探す正規表現（1回の走査で判定）"""
+    return re.compile("|".join(map(re.escape, keywords)))
+
+# サンプル値（小文字化済み）のキーワードパターンとスコア
+_SAMPLE_VALUE_PATTERNS = (
+    ("hr_data", 5, _keyword_re(["営業部", "it部", "人事部", "財務部", "マーケティング部"])),
+    ("hr_data", 3, _keyword_re(["主任", "係長", "一般", "部長", "課長"])),
+    ("marketing_data", 5, _keyword_re(["google広告", "facebook広告", "youtube広告", "instagram広告", "line広告", "tiktok広告"])),
+    ("inventory_data", 2, _keyword_re(["個", "本", "kg", "箱", "セット", "台"])),
+    ("inventory_data", 4, _keyword_re(["入荷待ち", "出荷済み", "在庫切れ", "調達中"])),
+    ("customer_data", 3, _keyword_re(["男性", "女性", "male", "female", "男", "女"])),
+)
+_RISK_LEVEL_RE = _keyword_re(["低", "中", "高"])
+_AGE_GROUP_RE = _keyword_re(["20代", "30代", "40代", "50代", "60代"])
+_MARKETING_METRIC_RE = _keyword_re(["roi", "達成率", "満足度"])  # 列名（小文字化済み）に対して判定
+_STORE_KEYS = frozenset({"店舗", "store"})
+
+def _identify_data_type(columns: Sequence[str], sample_data: List[Dict[str, Any]]) -> str:
+    """データの列名とサンプルから財務データの種類を自動判別（7つの分析タイプに特化）"""
+    if not columns:
+        return "financial_data"
     
-    # 顧客分析データの中程度キーワード
-    customer_medium_keywords = ["セグメント", "segment", "年齢", "age", "性別", "gender", "地域", "region", "購入履歴", "purchase", "アクセス", "access", "クリック", "click"]
-    for keyword in customer_medium_keywords:
-        if keyword in col_str:
-            scores["customer_data"] += 1
+    scores = dict(_score_columns(tuple(columns)))
     
     # データの内容からも判定（サンプルデータが利用可能な場合）
     if sample_data and len(sample_data) > 0:
@@ -346,49 +624,40 @@ def _identify_data_type(columns: List[str], sample_data: List[Dict[str, Any]]) -
         # 人事データの特徴的な値パターン
         for key, value in sample.items():
             str_value = str(value).lower()
+            key_lower = key.lower()
+            
+            # 値のキーワードパターン（人事の部署・役職、広告媒体、在庫の単位・状態、性別）
+            for data_type, score, pattern in _SAMPLE_VALUE_PATTERNS:
+                if pattern.search(str_value):
+                    scores[data_type] += score
             
             # 人事系の値パターン
-            if any(dept in str_value for dept in ["営業部", "it部", "人事部", "財務部", "マーケティング部"]):
-                scores["hr_data"] += 5
-            if any(pos in str_value for pos in ["主任", "係長", "一般", "部長", "課長"]):
-                scores["hr_data"] += 3
-            if any(risk in str_value for risk in ["低", "中", "高"]) and ("リスク" in key or "risk" in key.lower()):
+            if _RISK_LEVEL_RE.search(str_value) and ("リスク" in key or "risk" in key_lower):
                 scores["hr_data"] += 4
                 
             # マーケティング系の値パターン
-            if any(media in str_value for media in ["google広告", "facebook広告", "youtube広告", "instagram広告", "line広告", "tiktok広告"]):
-                scores["marketing_data"] += 5
-            if "%" in str_value and any(metric in key.lower() for metric in ["roi", "達成率", "満足度"]):
+            if "%" in str_value and _MARKETING_METRIC_RE.search(key_lower):
                 scores["marketing_data"] += 2
                 
             # 売上系の値パターン（数値が大きく、商品名がある場合）
-            if "商品" in key or "product" in key.lower():
+            if "商品" in key or "product" in key_lower:
                 scores["sales_data"] += 3
-            if key.lower() in ["店舗", "store"] and str_value:
+            if key_lower in _STORE_KEYS and str_value:
                 scores["sales_data"] += 4
                 
             # 在庫系の値パターン
-            if any(unit in str_value for unit in ["個", "本", "kg", "箱", "セット", "台"]):
-                scores["inventory_data"] += 2
-            if "warehouse" in key.lower() or "倉庫" in key:
+            if "warehouse" in key_lower or "倉庫" in key:
                 scores["inventory_data"] += 3
-            if any(status in str_value for status in ["入荷待ち", "出荷済み", "在庫切れ", "調達中"]):
-                scores["inventory_data"] += 4
                 
             # 顧客系の値パターン  
-            if any(age in str_value for age in ["20代", "30代", "40代", "50代", "60代"]) or str_value.isdigit() and 18 <= int(str_value) <= 80:
-                scores["customer_data"] += 3
-            if any(gender in str_value for gender in ["男性", "女性", "male", "female", "男", "女"]):
+            if _AGE_GROUP_RE.search(str_value) or str_value.isdigit() and 18 <= int(str_value) <= 80:
                 scores["customer_data"] += 3
             if "@" in str_value:  # メールアドレス
                 scores["customer_data"] += 4
     
-    # 最高スコアのタイプを返す
-    if max(scores.values()) > 0:
-        return max(scores, key=scores.get)
-    
-    # デフォルト
-    return "financial_data"
+    # 最高スコアのタイプを返す（同点は先に定義したタイプ、全て0ならデフォルト）
+    best = max(scores, key=scores.__getitem__)
+    return best if scores[best] > 0 else "financial_data"
 
 def _get_data_type_name(data_type: str) -> str:
     """データタイプの日本語名を返す"""
@@ -475,31 +744,30 @@ def validate_analysis_compatibility(detected_data_type: str, requested_analysis_
     
     return True, ""
 
-def _get_practical_analysis_instructions(data_type: str) -> str:
-    """データタイプ別の実践的分析指示を返す"""
-    instructions = {
-        "pl_statement": """
+# データタイプ別の実践的分析指示（モジュール読み込み時に1回だけ構築）
+_PRACTICAL_INSTRUCTIONS: Dict[str, str] = {
+    "pl_statement": """
 **即効性のある財務改善分析**
 - 粗利率の低い商品・サービスを特定し、価格見直しまたは原価削減の具体案
 - 販管費で削減可能な項目トップ3と削減金額を算出
 - 営業利益率を2%向上させるための具体的施策
 - 来月から実行できるコスト削減案（金額効果付き）""",
 
-        "balance_sheet": """
+    "balance_sheet": """
 **資金繰り改善の実践的提案**
 - 売掛金回収サイト短縮による資金繰り改善効果を計算
 - 在庫削減で捻出できる資金額と具体的削減対象
 - 流動比率改善のための即効性ある施策
 - 借入金利負担軽減のための金融機関交渉ポイント""",
 
-        "cashflow_statement": """
+    "cashflow_statement": """
 **キャッシュフロー改善の具体的アクション**
 - 回収サイト・支払サイト見直しによる資金繰り改善額
 - 不要な設備投資の見直し対象と節約効果
 - 営業CFを月○○万円改善するための具体的手順
 - 資金ショート回避のための緊急対応策""",
-        
-        "sales_data": """
+    
+    "sales_data": """
 **即効性売上改善アクション**
 
 **今月実行可能な売上向上策**
@@ -519,14 +787,8 @@ def _get_practical_analysis_instructions(data_type: str) -> str:
 - 客単価・成約率・リピート率の改善による売上インパクト試算
 - 営業コスト削減と売上効率化の両立案
 - 競合対策として即座に実行すべき差別化施策""",
-        
-        "inventory_data": """
-- 在庫の総額、商品別構成を確認してください
-- 在庫回転率や滞留在庫があれば指摘してください
-- 適正在庫レベルと過剰在庫のリスクを評価してください
-- 在庫管理の改善点があれば提案してください""",
-        
-        "hr_data": """
+    
+    "hr_data": """
 **即効性人事改善アクション**
 
 **今月実行可能な生産性向上策**
@@ -546,8 +808,8 @@ def _get_practical_analysis_instructions(data_type: str) -> str:
 - 業務属人化解消のためのマニュアル化・引継ぎ体制
 - 管理職の人事評価スキル向上のための実践研修
 - 給与・賞与の適正化による人件費配分最適化""",
-        
-        "marketing_data": """
+    
+    "marketing_data": """
 **即効性マーケティング改善アクション**
 
 **今月実行可能な広告効率化**
@@ -568,7 +830,7 @@ def _get_practical_analysis_instructions(data_type: str) -> str:
 - 競合他社の成功事例を参考にした低コスト施策の導入
 - マーケティングオートメーション導入による人件費削減効果""",
 
-        "inventory_data": """
+    "inventory_data": """
 **即効性在庫改善アクション**
 
 **今月実行可能な在庫最適化**
@@ -589,7 +851,7 @@ def _get_practical_analysis_instructions(data_type: str) -> str:
 - 売れ筋商品の欠品防止のための発注アラート設定
 - 在庫評価損を最小化するための定期的な棚卸し・評価見直し""",
 
-        "customer_data": """
+    "customer_data": """
 **即効性顧客関係改善アクション**
 
 **今月実行可能な顧客価値向上策**
@@ -609,8 +871,8 @@ def _get_practical_analysis_instructions(data_type: str) -> str:
 - 解約・離脱予兆の早期発見システムと対応フロー構築
 - 顧客対応品質向上のためのスタッフ研修・マニュアル整備
 - 顧客ニーズに基づく商品・サービス改善の優先順位付け""",
-        
-        "financial_data": """
+    
+    "financial_data": """
 **即効性財務改善アクション**
 
 **今月実行可能な収益性向上策**
@@ -630,16 +892,16 @@ def _get_practical_analysis_instructions(data_type: str) -> str:
 - 主要取引先の与信管理強化による貸倒リスク軽減
 - 為替・金利変動リスクのヘッジ手法導入
 - 事業継続性確保のための緊急時資金調達手段の確保"""
-    }
-    return instructions.get(data_type, instructions["financial_data"])
+}
 
-def _get_industry_specific_instructions(data_type: str, industry: str = "general") -> str:
-    """業種別・データタイプ別の専門的分析指示を返す"""
+def _get_practical_analysis_instructions(data_type: str) -> str:
+    """データタイプ別の実践的分析指示を返す"""
+    return _PRACTICAL_INSTRUCTIONS.get(data_type, _PRACTICAL_INSTRUCTIONS["financial_data"])
 
-    # 業種別の専門指示
-    industry_instructions = {
-        "retail": {  # 小売業
-            "sales_data": """
+# 業種別の専門指示（モジュール読み込み時に1回だけ構築）
+_INDUSTRY_INSTRUCTIONS: Dict[str, Dict[str, str]] = {
+    "retail": {  # 小売業
+        "sales_data": """
 **小売業売上最適化 - 実店舗運営の実践的改善**
 
 **店舗運営の即効改善（今日から実行可能）**
@@ -660,7 +922,7 @@ def _get_industry_specific_instructions(data_type: str, industry: str = "general
 - 口コミ・地域評判向上の無料集客手法
 - 客単価向上のクロスセル・セット販売テクニック""",
 
-            "inventory_data": """
+        "inventory_data": """
 **小売業在庫管理 - 資金効率最大化**
 
 **即効性在庫最適化（今週実行）**
@@ -681,7 +943,7 @@ def _get_industry_specific_instructions(data_type: str, industry: str = "general
 - 店舗特性に応じた在庫配分アルゴリズム
 - 取引先との支払条件交渉による資金繰り改善""",
 
-            "customer_data": """
+        "customer_data": """
 **小売業顧客戦略 - 地域密着型売上向上**
 
 **常連客育成・離脱防止（即効性あり）**
@@ -702,7 +964,7 @@ def _get_industry_specific_instructions(data_type: str, industry: str = "general
 - 客層別（主婦・サラリーマン・高齢者）接客手法
 - 地域特性を活かした商品構成と価格設定""",
 
-            "hr_data": """
+        "hr_data": """
 **小売業人事管理 - 店舗運営効率化**
 
 **店舗スタッフ生産性向上（即効改善）**
@@ -723,7 +985,7 @@ def _get_industry_specific_instructions(data_type: str, industry: str = "general
 - 多能工化による人件費効率向上
 - 人時売上向上の具体的改善策""",
 
-            "marketing_data": """
+        "marketing_data": """
 **小売業マーケティング - 地域密着集客**
 
 **低コスト集客・販促効果最大化**
@@ -744,7 +1006,7 @@ def _get_industry_specific_instructions(data_type: str, industry: str = "general
 - アプリ・ポイントカード活用の効果測定
 - オンライン・オフライン統合戦略""",
 
-            "financial_data": """
+        "financial_data": """
 **小売業財務管理 - 資金効率最大化**
 
 **キャッシュフロー改善（即効性あり）**
@@ -764,10 +1026,10 @@ def _get_industry_specific_instructions(data_type: str, industry: str = "general
 - 人件費率・家賃比率の業界標準比較
 - 資金調達コスト削減の金融機関交渉
 - 事業拡大時の資金計画・リスク管理"""
-        },
+    },
 
-        "manufacturing": {  # 製造業
-            "inventory_data": """
+    "manufacturing": {  # 製造業
+        "inventory_data": """
 **製造業在庫管理 - 生産効率最大化**
 
 **生産計画・在庫最適化（即効性あり）**
@@ -788,7 +1050,7 @@ def _get_industry_specific_instructions(data_type: str, industry: str = "general
 - 外注費削減の交渉ポイントと代替案
 - エネルギーコスト削減の具体的手法""",
 
-            "hr_data": """
+        "hr_data": """
 **製造業人事管理 - 生産性・安全性向上**
 
 **現場作業員の生産性向上**
@@ -809,7 +1071,7 @@ def _get_industry_specific_instructions(data_type: str, industry: str = "general
 - 健康管理による欠勤率・離職率削減
 - 労働基準法遵守とコスト最適化の両立""",
 
-            "sales_data": """
+        "sales_data": """
 **製造業売上管理 - 受注・納期最適化**
 
 **受注体制・顧客管理最適化**
@@ -830,7 +1092,7 @@ def _get_industry_specific_instructions(data_type: str, industry: str = "general
 - 長期受注案件の収益性確保戦略
 - 競合他社との差別化ポイント強化""",
 
-            "customer_data": """
+        "customer_data": """
 **製造業顧客管理 - B2B関係最適化**
 
 **長期顧客関係維持・拡大**
@@ -851,7 +1113,7 @@ def _get_industry_specific_instructions(data_type: str, industry: str = "general
 - 長期取引予測と適正在庫・設備投資
 - 顧客集約リスク回避と水平展開""",
 
-            "marketing_data": """
+        "marketing_data": """
 **製造業マーケティング - B2Bブランディング**
 
 **技術マーケティング・信頼性向上**
@@ -872,7 +1134,7 @@ def _get_industry_specific_instructions(data_type: str, industry: str = "general
 - 顧客事例・導入実績による信頼性訴求
 - アフターサービス充実による長期関係構築""",
 
-            "financial_data": """
+        "financial_data": """
 **製造業財務管理 - 生産効率連動最適化**
 
 **原価管理・収益性向上**
@@ -892,10 +1154,10 @@ def _get_industry_specific_instructions(data_type: str, industry: str = "general
 - 生産能力拡大投資のタイミング最適化
 - M&A・業務提携による成長戦略
 - 税務最適化と研究開発税制活用"""
-        },
+    },
 
-        "service": {  # サービス業
-            "hr_data": """
+    "service": {  # サービス業
+        "hr_data": """
 **サービス業人事管理 - 顧客満足度・収益性向上**
 
 **接客スキル・サービス品質向上**
@@ -916,7 +1178,7 @@ def _get_industry_specific_instructions(data_type: str, industry: str = "general
 - パート・アルバイト活用の効率化
 - デジタル化による業務効率向上""",
 
-            "customer_data": """
+        "customer_data": """
 **サービス業顧客戦略 - 満足度・収益性向上**
 
 **顧客満足度・リピート率向上**
@@ -937,7 +1199,7 @@ def _get_industry_specific_instructions(data_type: str, industry: str = "general
 - 顧客セグメント別価格戦略
 - サービス付加価値向上による差別化""",
 
-            "sales_data": """
+        "sales_data": """
 **サービス業売上管理 - サービス品質連動売上**
 
 **サービス品質と売上の直結**
@@ -958,7 +1220,7 @@ def _get_industry_specific_instructions(data_type: str, industry: str = "general
 - 顧客層別（ファミリー・カップル・シニア）メニュー最適化
 - アップセル・クロスセルの効果的提案手法""",
 
-            "inventory_data": """
+        "inventory_data": """
 **サービス業在庫管理 - 商材・設備効率最適化**
 
 **サービス提供に必要な商材管理**
@@ -979,7 +1241,7 @@ def _get_industry_specific_instructions(data_type: str, industry: str = "general
 - サービスメニュー変更に対応した柔軟な在庫管理
 - サービス中断リスク最小化の安全在庫設定""",
 
-            "marketing_data": """
+        "marketing_data": """
 **サービス業マーケティング - 体験型集客**
 
 **口コミ・紹介マーケティング最適化**
@@ -1000,7 +1262,7 @@ def _get_industry_specific_instructions(data_type: str, industry: str = "general
 - メールマガジン・ニュースレターによる顧客育成
 - インフルエンサーマーケティングの効果測定""",
 
-            "financial_data": """
+        "financial_data": """
 **サービス業財務管理 - サービス品質連動収益**
 
 **サービス品質と収益性の直結**
@@ -1020,21 +1282,16 @@ def _get_industry_specific_instructions(data_type: str, industry: str = "general
 - サービスメニュー拡充投資の効果測定
 - フランチャイズ展開と直営拡大の比較分析
 - M&A・業務提携による成長戦略とリスク管理"""
-        }
     }
+}
 
-    # 一般的な指示（業種指定がない場合）
-    general_instructions = _get_practical_analysis_instructions(data_type)
-
+def _get_industry_specific_instructions(data_type: str, industry: str = "general") -> str:
+    """業種別・データタイプ別の専門的分析指示を返す"""
     # 業種別指示があれば使用、なければ一般的指示
-    if industry in industry_instructions and data_type in industry_instructions[industry]:
-        return industry_instructions[industry][data_type]
-    else:
-        return general_instructions
-
-def _bedrock_converse(model_id: str, region: str, prompt: str, industry: str = "general") -> str:
-    client = boto3.client("bedrock-runtime", region_name=region)
+    return _INDUSTRY_INSTRUCTIONS.get(industry, {}).get(data_type) or _get_practical_analysis_instructions(data_type)
 
+def _converse_request(model_id: str, prompt: str, industry: str = "general", cache_prefix: str = "") -> Dict[str, Any]:
+    """converse / converse_stream 共通のリクエストパラメータを組み立てる"""
     # 業種名マッピング
     industry_names = {
         "retail": "小売業",
@@ -1079,12 +1336,56 @@ def _bedrock_converse(model_id: str, region: str, prompt: str, industry: str = "
 
 あなたの提案は、経営者が今日読んで明日から実行に移せる実用性を最優先してください。理論的完璧さより実践的価値を重視してください。"""
     }]
-    resp = client.converse(
-        modelId=model_id,
-        system=system_ja,
-        messages=[{"role": "user", "content": [{"text": prompt}]}],
-        inferenceConfig={"maxTokens": MAX_TOKENS, "temperature": TEMPERATURE}
-    )
+
+    # 固定部分の直後にcachePointを置き、Bedrock側でプレフィックスを再利用させる
+    content = [{"text": prompt}]
+    if PROMPT_CACHE:
+        system_ja.append({"cachePoint": {"type": "default"}})
+        if cache_prefix and prompt.startswith(cache_prefix) and len(prompt) > len(cache_prefix):
+            content = [
+                {"text": cache_prefix},
+                {"cachePoint": {"type": "default"}},
+                {"text": prompt[len(cache_prefix):]}
+            ]
+
+    return {
+        "modelId": model_id,
+        "system": system_ja,
+        "messages": [{"role": "user", "content": content}],
+        "inferenceConfig": {"maxTokens": MAX_TOKENS, "temperature": TEMPERATURE}
+    }
+
+def _log_usage(usage: Dict[str, Any]) -> None:
+    """トークン使用量をログ出力（プロンプトキャッシュのヒット確認用）"""
+    if usage:
+        logger.info(
+            f"Bedrock usage: input={usage.get('inputTokens', 0)} output={usage.get('outputTokens', 0)} "
+            f"cacheRead={usage.get('cacheReadInputTokens', 0)} cacheWrite={usage.get('cacheWriteInputTokens', 0)}"
+        )
+
+def _bedrock_converse_stream(model_id: str, prompt: str, industry: str = "general", cache_prefix: str = "") -> Iterator[str]:
+    """converse_streamの出力テキストを届いた順に返す（DeepSeekのreasoningContentは無視）"""
+    resp = BEDROCK_CLIENT.converse_stream(**_converse_request(model_id, prompt, industry, cache_prefix))
+    last_index = None
+    for event in resp["stream"]:
+        if "metadata" in event:
+            _log_usage(event["metadata"].get("usage", {}))
+            continue
+        block = event.get("contentBlockDelta")
+        if not block or "text" not in block.get("delta", {}):
+            continue
+        # converseと同様、コンテンツブロックの区切りは改行で連結
+        if last_index is not None and block.get("contentBlockIndex") != last_index:
+            yield "\n"
+        last_index = block.get("contentBlockIndex")
+        yield block["delta"]["text"]
+
+def _bedrock_converse_uncached(model_id: str, prompt: str, industry: str = "general", cache_prefix: str = "") -> str:
+    if BEDROCK_STREAM:
+        return "".join(_bedrock_converse_stream(model_id, prompt, industry, cache_prefix)).strip()
+
+    resp = BEDROCK_CLIENT.converse(**_converse_request(model_id, prompt, industry, cache_prefix))
+    _log_usage(resp.get("usage", {}))
     msg = resp.get("output", {}).get("message", {})
     parts = msg.get("content", [])
     txts = []
@@ -1093,53 +1394,209 @@ def _bedrock_converse(model_id: str, region: str, prompt: str, industry: str = "
             txts.append(p["text"])
     return "\n".join([t for t in txts if t]).strip()
 
-def _process_image_with_textract(image_data: str, mime_type: str) -> str:
-    """AWS Textractを使用して画像からテキストを抽出"""
+# Bedrock応答キャッシュ（同一データの再分析時に呼び出しを省略）
+_RESPONSE_CACHE: "OrderedDict[str, str]" = OrderedDict()  # blake2b(モデル・業種・プロンプト) -> 生成テキスト（コンテナ内LRU）
+_RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "0"))  # 保持件数（既定0=無効。同一データでも毎回分析し直す）
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+def _bedrock_converse(model_id: str, prompt: str, industry: str = "general", cache_prefix: str = "") -> str:
+    """同一プロンプトの生成結果をコンテナ内で再利用（エラー・空応答はキャッシュしない）"""
+    if not _RESPONSE_CACHE_SIZE:
+        return _bedrock_converse_uncached(model_id, prompt, industry, cache_prefix)
+
+    # プロンプトには統計・サンプル・データタイプ・出力形式が全て含まれるため、これをキーにすれば取り違えない
+    key = hashlib.blake2b("\0".join((model_id, industry, prompt)).encode("utf-8"), digest_size=16).hexdigest()
+    with _RESPONSE_CACHE_LOCK:
+        text = _RESPONSE_CACHE.get(key)
+        if text is not None:
+            _RESPONSE_CACHE.move_to_end(key)
+            logger.info("Bedrock response cache hit")
+            return text
+
+    text = _bedrock_converse_uncached(model_id, prompt, industry, cache_prefix)
+    if text:
+        with _RESPONSE_CACHE_LOCK:
+            _RESPONSE_CACHE[key] = text
+            if len(_RESPONSE_CACHE) > _RESPONSE_CACHE_SIZE:
+                _RESPONSE_CACHE.popitem(last=False)
+    return text
+
+async def _bedrock_converse_async(prompt: str, industry: str = "general", cache_prefix: str = "") -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_EXECUTOR, _bedrock_converse, MODEL_ID, prompt, industry, cache_prefix)
+
+# SPLIT_SECTIONS有効時に並列実行するセクション: (そのセクションから採用するキー, 出力範囲指示)
+_SECTION_INSTRUCTIONS = (
+    (("overview", "findings", "kpis", "trend"),
+     "【今回の出力範囲】overview・findings・kpis・trend のみをJSONで出力してください（action_planは不要）。"),
+    (("action_plan",),
+     "【今回の出力範囲】action_plan のみをJSONで出力してください（他のキーは不要）。")
+)
+
+async def _bedrock_converse_sections(prompt: str, industry: str = "general", cache_prefix: str = "") -> Dict[str, Any]:
+    """セクション別にBedrockを並列呼び出しし、各セクションの担当キーだけを採用してマージ"""
+    texts = await asyncio.gather(*[
+        _bedrock_converse_async(f"{prompt}\n\n{instruction}", industry, cache_prefix)
+        for _, instruction in _SECTION_INSTRUCTIONS
+    ])
+    merged: Dict[str, Any] = {}
+    for (keys, _), text in zip(_SECTION_INSTRUCTIONS, texts):
+        result = _parse_ai_json(text)
+        if not isinstance(result, dict):
+            continue
+        # 解析失敗時のフォールバック（{"overview": 生テキスト}）や範囲外のキーが他セクションの結果を上書きしないように
+        merged.update((key, result[key]) for key in keys if key in result)
+    return merged
+
+# ```json ... ``` で囲まれた応答の本文を取り出す
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL | re.IGNORECASE)
+
+def _parse_ai_json(ai_text: str) -> Dict[str, Any]:
+    """AI応答からJSONを取り出す。フェンス除去・部分抽出に軽く対応"""
+    m = _FENCE_RE.match(ai_text)
+    text = m.group(1) if m else ai_text.strip()
     try:
-        textract = boto3.client('textract', region_name=REGION)
-        
-        # Base64デコード
-        image_bytes = base64.b64decode(image_data)
-        
-        # Textractでテキスト抽出
-        response = textract.detect_document_text(
-            Document={'Bytes': image_bytes}
-        )
-        
-        # テキストを結合
-        extracted_text = []
-        for item in response['Blocks']:
-            if item['BlockType'] == 'LINE':
-                extracted_text.append(item['Text'])
-        
-        return '\n'.join(extracted_text)
-    
-    except Exception as e:
-        logger.error(f"Textract error: {str(e)}")
-        return f"テキスト抽出エラー: {str(e)}"
+        return _loads(text)
+    except Exception:
+        pass
+    # 最後の手段：最初の{から最後の}までを取り出す
+    _, brace, rest = text.partition("{")
+    body, close, _ = rest.rpartition("}")
+    if brace and close:
+        try:
+            return _loads("{" + body + "}")
+        except Exception:
+            pass
+    return {"overview": ai_text}
 
-def _analyze_document_image(image_data: str, mime_type: str, analysis_type: str) -> str:
-    """画像書類を分析してビジネス分析を実行"""
+_TEXTRACT_MAX_BYTES = 10 * 1024 * 1024  # 同期API(detect_document_text)のBytes上限
+_TEXTRACT_ASYNC_TIMEOUT = 120  # 非同期ジョブの完了待ち上限（秒）
+
+def _extract_text_lines_async(textract: Any, image_bytes: bytes, mime_type: str) -> str:
+    """S3経由でTextract非同期API(start_document_text_detection)を実行し、全ページのLINEブロックを結合"""
+    s3 = _get_s3_client()
+    ext = "pdf" if mime_type == "application/pdf" else mime_type.rpartition("/")[2] or "bin"
+    key = f"textract-input/{hashlib.sha256(image_bytes).hexdigest()}.{ext}"
+    s3.put_object(Bucket=TEXTRACT_S3_BUCKET, Key=key, Body=image_bytes)
     try:
-        # Textractでテキスト抽出
-        extracted_text = _process_image_with_textract(image_data, mime_type)
+        job_id = textract.start_document_text_detection(
+            DocumentLocation={"S3Object": {"Bucket": TEXTRACT_S3_BUCKET, "Name": key}}
+        )["JobId"]
+        deadline = time.monotonic() + _TEXTRACT_ASYNC_TIMEOUT
+        lines: List[str] = []
+        kwargs: Dict[str, Any] = {"JobId": job_id}
+        while True:
+            response = textract.get_document_text_detection(**kwargs)
+            status = response["JobStatus"]
+            if status == "IN_PROGRESS":
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Textract job {job_id} did not finish in {_TEXTRACT_ASYNC_TIMEOUT}s")
+                time.sleep(1)
+                continue
+            if status != "SUCCEEDED" and status != "PARTIAL_SUCCESS":
+                raise RuntimeError(f"Textract job {job_id} {status}: {response.get('StatusMessage', '')}")
+            lines.extend(b['Text'] for b in response['Blocks'] if b['BlockType'] == 'LINE')
+            if "NextToken" not in response:
+                return '\n'.join(lines)
+            kwargs = {"JobId": job_id, "NextToken": response["NextToken"]}
+    finally:
+        try:
+            s3.delete_object(Bucket=TEXTRACT_S3_BUCKET, Key=key)
+        except Exception as e:
+            logger.warning(f"Textract input cleanup failed: {str(e)}")
+
+def _extract_text_lines(textract: Any, image_bytes: bytes, mime_type: str = "") -> str:
+    """Textractでテキスト抽出し、LINEブロックを改行で結合"""
+    # PDF（複数ページの可能性あり）と同期APIの上限を超える書類は、バケット設定時のみ非同期APIを使用
+    if TEXTRACT_S3_BUCKET and (mime_type == "application/pdf" or len(image_bytes) > _TEXTRACT_MAX_BYTES):
+        return _extract_text_lines_async(textract, image_bytes, mime_type)
+
+    response = textract.detect_document_text(
+        Document={'Bytes': image_bytes}
+    )
+    
+    # LINEブロックのテキストのみを結合
+    return '\n'.join(b['Text'] for b in response['Blocks'] if b['BlockType'] == 'LINE')
+
+# Textract結果キャッシュ（同一画像の再アップロード・再分析時にOCRを省略）
+_OCR_CACHE: "OrderedDict[str, str]" = OrderedDict()  # sha256 -> 抽出テキスト（コンテナ内LRU）
+_OCR_CACHE_SIZE = 128
+_OCR_CACHE_DIR = "/tmp/textract-cache"  # ウォームコンテナ内で永続（/tmpは同一実行環境で共有）
+_OCR_CACHE_MAX_BYTES = 4 * 1024 * 1024  # これを超える画像はハッシュ・保存コストの方が大きいため対象外
+_OCR_CACHE_LOCK = threading.Lock()
+
+def _write_ocr_cache_file(path: str, text: str) -> None:
+    """一時ファイルに書き込んでからos.replaceで置き換え（他スレッドが書き込み途中の内容を読まないように）"""
+    tmp_path = ""
+    try:
+        os.makedirs(_OCR_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=_OCR_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(text)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"OCR cache write failed: {str(e)}")
+        if tmp_path:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+def _textract_cached(textract: Any, image_bytes: bytes, mime_type: str = "") -> str:
+    """_extract_text_linesの結果を画像のSHA-256で再利用（エラーはキャッシュしない）"""
+    if len(image_bytes) > _OCR_CACHE_MAX_BYTES:
+        return _extract_text_lines(textract, image_bytes, mime_type)
+
+    key = hashlib.sha256(image_bytes).hexdigest()
+    with _OCR_CACHE_LOCK:
+        text = _OCR_CACHE.get(key)
+        if text is not None:
+            _OCR_CACHE.move_to_end(key)
+            return text
+
+    path = os.path.join(_OCR_CACHE_DIR, f"{key}.txt")
+    try:
+        with open(path, encoding="utf-8") as fh:
+            text = fh.read()
+    except OSError:
+        text = ""
+    if not text:  # 未作成・空ファイルはキャッシュミス扱い（空のOCR結果は保存しない）
+        text = _extract_text_lines(textract, image_bytes, mime_type)
+        if text:
+            _write_ocr_cache_file(path, text)
+
+    with _OCR_CACHE_LOCK:
+        _OCR_CACHE[key] = text
+        if len(_OCR_CACHE) > _OCR_CACHE_SIZE:
+            _OCR_CACHE.popitem(last=False)
+    return text
+
+def _normalize_mime(mime_type: Optional[str]) -> str:
+    """Content-Typeのパラメータ（; charset等）を除いて小文字化"""
+    return (mime_type or "").split(";")[0].strip().lower()
+
+# 書類種類判定用のキーワード（1回の走査で全種類を検出。OCR結果の大文字英字にも対応）
+_DOC_TYPE_RE = re.compile(
+    r"(?P<receipt>領収書|レシート|receipt)|(?P<invoice>請求書|invoice|bill)|"
+    r"(?P<card>名刺|business card)|(?P<report>報告書|レポート|report)",
+    re.IGNORECASE
+)
+# 複数種類のキーワードを含む場合は上から優先
+_DOC_TYPE_LABELS = (
+    ("receipt", "領収書・レシート"),
+    ("invoice", "請求書"),
+    ("card", "名刺"),
+    ("report", "報告書・レポート"),
+)
+
+def _build_document_prompt(extracted_text: str) -> Tuple[str, str]:
+    """抽出テキストから書類種類を判定し、(書類種類, AI分析用プロンプト)を返す"""
+    # 抽出されたテキストの種類を判定
+    found = {m.lastgroup for m in _DOC_TYPE_RE.finditer(extracted_text)}
+    document_type = next((label for group, label in _DOC_TYPE_LABELS if group in found), "不明な書類")
         
-        if "エラー" in extracted_text:
-            return extracted_text
-            
-        # 抽出されたテキストの種類を判定
-        document_type = "不明な書類"
-        if any(keyword in extracted_text for keyword in ["領収書", "レシート", "receipt"]):
-            document_type = "領収書・レシート"
-        elif any(keyword in extracted_text for keyword in ["請求書", "invoice", "bill"]):
-            document_type = "請求書"
-        elif any(keyword in extracted_text for keyword in ["名刺", "business card"]):
-            document_type = "名刺"
-        elif any(keyword in extracted_text for keyword in ["報告書", "レポート", "report"]):
-            document_type = "報告書・レポート"
-            
-        # AI分析用プロンプト作成
-        prompt = f"""
+    # AI分析用プロンプト作成
+    prompt = f"""
 以下の{document_type}の内容を分析し、ビジネス上の洞察を提供してください：
 
 【抽出されたテキスト】
@@ -1154,11 +1611,10 @@ def _analyze_document_image(image_data: str, mime_type: str, analysis_type: str)
 
 日本語で分かりやすく分析結果を提供してください。
 """
-        
-        # Bedrockで分析実行
-        analysis_result = _bedrock_converse(MODEL_ID, REGION, prompt)
-        
-        return f"""📄 **書類画像分析結果**
+    return document_type, prompt
+
+def _format_document_result(document_type: str, analysis_result: str, extracted_text: str) -> str:
+    return f"""📄 **書類画像分析結果**
 
 **書類種類**: {document_type}
 
@@ -1170,18 +1626,113 @@ def _analyze_document_image(image_data: str, mime_type: str, analysis_type: str)
 ```
 {extracted_text}
 ```"""
+
+# Textractが受け付ける形式。対象外はAPI呼び出し前に弾く
+_SUPPORTED_IMAGE_MIME = frozenset({"image/jpeg", "image/jpg", "image/png", "image/tiff", "application/pdf"})
+
+async def _extract_document_text_async(image_data: Union[str, bytes], mime_type: str) -> Tuple[str, str]:
+    """画像からテキストを抽出し(抽出テキスト, エラーメッセージ)を返す（いずれか一方のみ非空）"""
+    mime_type = _normalize_mime(mime_type)
+    if mime_type not in _SUPPORTED_IMAGE_MIME:
+        return "", f"サポートされていない画像形式です: {mime_type}（JPEG・PNG・TIFF・PDFに対応）"
+
+    loop = asyncio.get_running_loop()
+    try:
+        if isinstance(image_data, bytes):
+            image_bytes = image_data
+            textract = await loop.run_in_executor(_EXECUTOR, _get_textract_client)
+        else:
+            # Base64デコードとTextractクライアント生成（コンテナ初回のみ）を並行実行
+            image_bytes, textract = await asyncio.gather(
+                loop.run_in_executor(_EXECUTOR, binascii.a2b_base64, image_data),
+                loop.run_in_executor(_EXECUTOR, _get_textract_client)
+            )
+        if len(image_bytes) > _TEXTRACT_MAX_BYTES and not TEXTRACT_S3_BUCKET:
+            return "", f"画像サイズが大きすぎます（上限{_TEXTRACT_MAX_BYTES // (1024 * 1024)}MB）"
+        # Textractでテキスト抽出
+        return await loop.run_in_executor(_EXECUTOR, _textract_cached, textract, image_bytes, mime_type), ""
+    except Exception as e:
+        logger.error(f"Textract error: {str(e)}")
+        return "", f"テキスト抽出エラー: {str(e)}"
+
+async def _analyze_document_image_async(image_data: Union[str, bytes], mime_type: str, analysis_type: str) -> str:
+    """画像書類を分析してビジネス分析を実行（Textract・BedrockのI/Oはワーカースレッドで実行）"""
+    try:
+        extracted_text, error = await _extract_document_text_async(image_data, mime_type)
+        if error:
+            return error
+
+        document_type, prompt = _build_document_prompt(extracted_text)
+        
+        # Bedrockで分析実行
+        analysis_result = await _bedrock_converse_async(prompt)
+        
+        return _format_document_result(document_type, analysis_result, extracted_text)
         
     except Exception as e:
         logger.error(f"Document image analysis error: {str(e)}")
         return f"書類画像分析エラー: {str(e)}"
 
+_IMAGE_CONCURRENCY = 3  # 複数画像時のTextract/Bedrock同時実行数（スロットリング回避）
+
+async def _analyze_document_images(images: List[Tuple[Union[str, bytes], str]], analysis_type: str) -> List[str]:
+    """複数画像を同時実行数を制限しつつ並列分析"""
+    semaphore = asyncio.Semaphore(_IMAGE_CONCURRENCY)
+
+    async def _run(image_data: Union[str, bytes], mime_type: str) -> str:
+        async with semaphore:
+            return await _analyze_document_image_async(image_data, mime_type, analysis_type)
+
+    return await asyncio.gather(*[_run(image_data, mime_type) for image_data, mime_type in images])
+
+async def _analyze_document_pages(images: List[Tuple[Union[str, bytes], str]], analysis_type: str) -> str:
+    """複数画像を1つの書類のページとして扱い、テキスト抽出のみ並列実行してBedrock分析は1回にまとめる"""
+    semaphore = asyncio.Semaphore(_IMAGE_CONCURRENCY)
+
+    async def _extract(image_data: Union[str, bytes], mime_type: str) -> Tuple[str, str]:
+        async with semaphore:
+            return await _extract_document_text_async(image_data, mime_type)
+
+    try:
+        extracted = await asyncio.gather(*[_extract(image_data, mime_type) for image_data, mime_type in images])
+        errors = [f"{i}ページ目: {error}" for i, (_, error) in enumerate(extracted, 1) if error]
+        pages = [f"--- {i}ページ目 ---\n{text}" for i, (text, error) in enumerate(extracted, 1) if not error]
+        if not pages:
+            return "\n".join(errors)
+
+        extracted_text = "\n\n".join(pages)
+        document_type, prompt = _build_document_prompt(extracted_text)
+        analysis_result = await _bedrock_converse_async(prompt)
+        result = _format_document_result(document_type, analysis_result, extracted_text)
+        return "\n".join([result, *errors]) if errors else result
+
+    except Exception as e:
+        logger.error(f"Document pages analysis error: {str(e)}")
+        return f"書類画像分析エラー: {str(e)}"
+
 # ====== LINE Notify & Sentry Webhook処理 ======
+_HTTP = None  # 外部HTTP用コネクションプール（ウォーム起動間でTLS接続を再利用）
+
+def _get_http():
+    global _HTTP
+    if _HTTP is None:
+        import urllib3  # botocoreの依存としてランタイムに同梱
+        _HTTP = urllib3.PoolManager(
+            num_pools=2, maxsize=4,
+            timeout=urllib3.Timeout(connect=2.0, read=8.0),
+            retries=urllib3.Retry(total=2, backoff_factor=0.2)
+        )
+    return _HTTP
+
 def send_line_notification(message: str) -> bool:
     """LINE Notify APIを使用してメッセージを送信"""
     if not LINE_NOTIFY_TOKEN:
         logger.error("LINE_NOTIFY_TOKEN not configured")
         return False
     
+    # 通知時のみ使用するためコールドスタートでは読み込まない
+    import urllib.parse
+
     try:
         headers = {
             'Authorization': f'Bearer {LINE_NOTIFY_TOKEN}',
@@ -1189,32 +1740,33 @@ def send_line_notification(message: str) -> bool:
         }
         data = {'message': message}
         
-        # urllib使用でrequests依存を除去
+        # urllib3のプールを使用（requests依存なし）
         data_encoded = urllib.parse.urlencode(data).encode('utf-8')
-        req = urllib.request.Request(
+        response = _get_http().request(
+            'POST',
             'https://notify-api.line.me/api/notify',
-            data=data_encoded,
+            body=data_encoded,
             headers=headers
         )
 
-        with urllib.request.urlopen(req, timeout=10) as response:
-            if response.status == 200:
-                logger.info("✅ LINE通知送信成功")
-                return True
-            else:
-                response_text = response.read().decode('utf-8')
-                logger.error(f"❌ LINE通知送信失敗: {response.status} - {response_text}")
-                return False
+        if response.status == 200:
+            logger.info("✅ LINE通知送信成功")
+            return True
+        else:
+            response_text = response.data.decode('utf-8', 'replace')
+            logger.error(f"❌ LINE通知送信失敗: {response.status} - {response_text}")
+            return False
             
     except Exception as e:
         logger.error(f"❌ LINE通知エラー: {str(e)}")
         return False
 
-def process_sentry_webhook(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    """Sentryからのwebhookペイロードを処理してLINE通知を送信"""
+def process_sentry_webhook(data: Dict[str, Any], sentry_hook: bool = False) -> Optional[Dict[str, Any]]:
+    """Sentryからのwebhookペイロードを処理してLINE通知を送信（sentry_hook=TrueはSentry-Hook-Resourceヘッダー付き）"""
     try:
         # Sentryペイロードの検出 - より柔軟に
         is_sentry_webhook = (
+            sentry_hook or
             "event" in data or 
             "action" in data or 
             ("data" in data and isinstance(data["data"], dict) and ("issue" in data["data"] or "event" in data["data"])) or
@@ -1251,12 +1803,7 @@ def process_sentry_webhook(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
             environment = event.get("environment", "")
             
         # LINE通知メッセージを作成
-        timestamp = ""
-        try:
-            from datetime import datetime
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        except Exception:
-            pass
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
             
         message = f"""🚨 【SAP Frontend - エラー通知】
 
@@ -1270,12 +1817,16 @@ def process_sentry_webhook(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
 """
         
         # LINE通知を送信
-        success = send_line_notification(message)
+        if LINE_ASYNC_NOTIFY:
+            _BG_EXECUTOR.submit(send_line_notification, message)
+            line_status = "dispatched"
+        else:
+            line_status = "success" if send_line_notification(message) else "failed"
         
         # レスポンスを返す
         return response_json(200, {
             "message": "Sentry webhook processed",
-            "line_notification": "success" if success else "failed",
+            "line_notification": line_status,
             "error_title": error_title,
             "project": project_name,
             "environment": environment
@@ -1289,7 +1840,108 @@ def process_sentry_webhook(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         })
 
 # ====== Handler ======
+# フロントエンドの分析リクエストの入力キーと、ハンドラーが入力として受け付ける型
+# （Sentryのペイロードにも "data" キーはあるが中身はdictのため、型まで見て区別する）
+_ANALYSIS_INPUTS = (
+    ("salesData", list), ("csv", str), ("rows", list), ("data", list),
+    ("imageData", str), ("images", list),
+)
+
+# フロントエンドの分析タイプ指定 -> データタイプ
+_ANALYSIS_TYPE_MAPPING = {
+    'sales': 'sales_data',
+    'hr': 'hr_data',
+    'marketing': 'marketing_data',
+    'inventory': 'inventory_data',
+    'customer': 'customer_data',
+    'financial': 'financial_data',
+    'strategic': 'financial_data'  # 統合戦略は財務分析として扱う
+}
+
+# 出力形式別のプロンプトビルダー（未登録の形式はJSON。JSONは業種とキャッシュ用プレフィックスも扱うため別処理）
+_FLAT_PROMPT_BUILDERS = {
+    "markdown": _build_prompt_markdown,
+    "text": _build_prompt_text
+}
+
+# ====== レポート表示設定（分析タイプ別） ======
+# レポート文面のテンプレート（リクエストごとにはformatのみ行う）
+_PRESENTATION_TMPL = "{total}件のデータを分析しました。売上合計は{total_sales:,}円で、1件あたり平均{avg_sales:,}円でした。主な売上は{trend_text}となっています。"
+_DATA_OVERVIEW_TMPL = """
+{icon} {name} - データ概要
+• 分析対象: {total}件のデータ
+• 総{metric}: {total_sales:,}{unit}
+• 平均{metric}: {avg_sales:,}{unit}/件"""
+
+_ANALYSIS_META = {
+    'sales_data': {'icon': '💰', 'name': '売上分析', 'unit': '円', 'metric': '売上'},
+    'hr_data': {'icon': '👥', 'name': '人事分析', 'unit': '円', 'metric': '人件費'},
+    'marketing_data': {'icon': '📢', 'name': 'マーケティング分析', 'unit': '円', 'metric': 'ROI'},
+    'inventory_data': {'icon': '📦', 'name': '在庫分析', 'unit': '個', 'metric': '在庫'},
+    'customer_data': {'icon': '🎯', 'name': '顧客分析', 'unit': '円', 'metric': 'LTV'},
+    'financial_data': {'icon': '📊', 'name': '財務分析', 'unit': '円', 'metric': '損益'}
+}
+
+_TOP_ITEM_LABELS = {
+    'sales_data': '🏆 主要商品・売上実績',
+    'hr_data': '👑 高給与・人件費上位',
+    'marketing_data': '🎯 効果的キャンペーン・ROI上位',
+    'inventory_data': '📈 主要商品・在庫金額',
+    'customer_data': '💎 優良顧客・LTV上位',
+    'financial_data': '💼 主要項目・金額実績'
+}
+
+_TREND_LABELS = {
+    'sales_data': '📈 売上推移',
+    'hr_data': '📊 人件費推移',
+    'marketing_data': '📉 ROI推移',
+    'inventory_data': '📦 在庫変動',
+    'customer_data': '👥 顧客価値推移',
+    'financial_data': '💹 財務指標推移'
+}
+
+def _image_analysis_response(images: List[Tuple[Union[str, bytes], str]], analysis_type: str,
+                             merge_pages: bool = False) -> Dict[str, Any]:
+    """画像書類分析を実行してレスポンスを返す（merge_pages指定時は全画像を1書類として1回で分析）"""
+    if not images:
+        return response_json(400, {
+            "response": {"summary": "画像データが含まれていません", "key_insights": [], "recommendations": []},
+            "format": "json", "message": "Missing image data"
+        })
+    
+    try:
+        logger.info(f"Starting image analysis ({len(images)} images)")
+        if merge_pages and len(images) > 1:
+            analysis_result = asyncio.run(_analyze_document_pages(images, analysis_type))
+        else:
+            analysis_result = "\n\n".join(asyncio.run(_analyze_document_images(images, analysis_type)))
+        
+        return response_json(200, {
+            "response": {
+                "summary": analysis_result,
+                "key_insights": ["画像からテキスト抽出完了", "AI分析実行済み"],
+                "recommendations": ["抽出データの検証推奨", "重要情報の別途保存推奨"],
+                "data_analysis": {"total_records": len(images), "document_type": "image"}
+            },
+            "format": "json", "message": "Image analysis completed", "engine": "bedrock+textract", "model": MODEL_ID
+        })
+        
+    except Exception as e:
+        logger.error(f"Image analysis error: {str(e)}")
+        return response_json(500, {
+            "response": {"summary": f"画像分析エラー: {str(e)}", "key_insights": [], "recommendations": []},
+            "format": "json", "message": "Image analysis failed"
+        })
+
+def _get_header(event: Dict[str, Any], name: str) -> str:
+    """リクエストヘッダーを大文字小文字を区別せずに取得（nameは小文字で指定）"""
+    return next((v for k, v in (event.get("headers") or {}).items() if k.lower() == name), "") or ""
+
 def lambda_handler(event, context):
+    # 日本語のレポート本文は圧縮率が高いため、GZIP_RESPONSES有効時はAccept-Encodingにgzipがあれば圧縮して返す
+    return _gzip_response(_handle_request(event, context), _get_header(event, "accept-encoding"))
+
+def _handle_request(event, context):
     # Early echo（必要時のみ）
     echo = _early_echo(event)
     if echo is not None:
@@ -1305,15 +1957,27 @@ def lambda_handler(event, context):
             "format": "json", "message": "Use POST", "engine": "bedrock", "model": MODEL_ID
         })
 
+    # 書類画像・PDFの直接アップロード（Content-Typeが対応形式）はJSONを経由せずデコード済みバイト列のまま分析
+    content_type = _normalize_mime(_get_header(event, "content-type"))
+    if event.get("isBase64Encoded") and content_type in _SUPPORTED_IMAGE_MIME:
+        query = event.get("queryStringParameters") or {}
+        try:
+            image_bytes = binascii.a2b_base64(event.get("body") or "")
+        except Exception:
+            image_bytes = b""
+        images = [(image_bytes, content_type)] if image_bytes else []
+        return _image_analysis_response(images, query.get("analysisType", "document"))
+
     # Parse body
     raw = event.get("body") or "{}"
     if event.get("isBase64Encoded"):
         try:
-            raw = base64.b64decode(raw).decode("utf-8", errors="ignore")
+            # base64.b64decodeのラッパーを通さずC実装で直接デコードし、バイト列のまま解析
+            raw = binascii.a2b_base64(raw)
         except Exception:
             pass
     try:
-        data = json.loads(raw)
+        data = _loads(raw)
     except Exception as e:
         return response_json(400, {
             "response": {"summary": f"INVALID_JSON: {str(e)}", "key_insights": [], "recommendations": [], "data_analysis": {"total_records": 0}},
@@ -1323,10 +1987,12 @@ def lambda_handler(event, context):
     # デバッグ: 受信データの構造をログ出力
     logger.info(f"🔍 受信データの構造: {list(data.keys())}")
     
-    # Sentry Webhook処理を最優先でチェック
-    sentry_response = process_sentry_webhook(data)
-    if sentry_response is not None:
-        return sentry_response
+    # Sentry Webhook処理を最優先でチェック（Sentry統合のヘッダーがあれば確定、分析データを含むリクエストは判定を省略）
+    sentry_hook = bool(_get_header(event, "sentry-hook-resource"))
+    if sentry_hook or not any(isinstance(data.get(key), kind) for key, kind in _ANALYSIS_INPUTS):
+        sentry_response = process_sentry_webhook(data, sentry_hook)
+        if sentry_response is not None:
+            return sentry_response
 
     # Inputs
     instruction = (data.get("instruction") or data.get("prompt") or "").strip()
@@ -1336,84 +2002,77 @@ def lambda_handler(event, context):
     
     # 画像処理の分岐（document分析 または fileType='image'）
     if requested_analysis_type == "document" or data.get("fileType") == "image":
-        image_data = data.get("imageData", "")
-        mime_type = data.get("mimeType", "image/jpeg")
+        # 複数画像は images: [{imageData, mimeType}, ...] で受け付ける
+        # mergePages: true なら複数ページの1書類としてまとめて分析（Bedrock呼び出しは1回）
+        images = [(img.get("imageData", ""), img.get("mimeType", "image/jpeg"))
+                  for img in (data.get("images") or []) if isinstance(img, dict) and img.get("imageData")]
+        if not images and data.get("imageData"):
+            images = [(data["imageData"], data.get("mimeType", "image/jpeg"))]
         
-        if not image_data:
-            return response_json(400, {
-                "response": {"summary": "画像データが含まれていません", "key_insights": [], "recommendations": []},
-                "format": "json", "message": "Missing image data"
-            })
-        
-        try:
-            logger.info("Starting image analysis")
-            analysis_result = _analyze_document_image(image_data, mime_type, requested_analysis_type)
-            
-            return response_json(200, {
-                "response": {
-                    "summary": analysis_result,
-                    "key_insights": ["画像からテキスト抽出完了", "AI分析実行済み"],
-                    "recommendations": ["抽出データの検証推奨", "重要情報の別途保存推奨"],
-                    "data_analysis": {"total_records": 1, "document_type": "image"}
-                },
-                "format": "json", "message": "Image analysis completed", "engine": "bedrock+textract", "model": MODEL_ID
-            })
-            
-        except Exception as e:
-            logger.error(f"Image analysis error: {str(e)}")
-            return response_json(500, {
-                "response": {"summary": f"画像分析エラー: {str(e)}", "key_insights": [], "recommendations": []},
-                "format": "json", "message": "Image analysis failed"
-            })
+        return _image_analysis_response(images, requested_analysis_type, bool(data.get("mergePages")))
     
     # FORCE_JA option
-    force_ja = os.environ.get("FORCE_JA","false").lower() in ("1","true")
-    if force_ja:
+    if FORCE_JA:
         instruction = ("日本語のみで、数値は半角。KPI・要点・トレンドを簡潔に。" + (" " + instruction if instruction else ""))
 
     # Prefer salesData (array). Optionally accept csv.
-    sales: List[Dict[str, Any]] = []
+    sales: List[Any] = []
+    csv_headers: Optional[Tuple[str, ...]] = None  # csv入力時のみ（salesはタプル行になる）
     if isinstance(data.get("salesData"), list):
         sales = data["salesData"]
     elif isinstance(data.get("csv"), str):
-        sales = _parse_csv_simple(data["csv"])
+        try:
+            csv_headers, sales = _parse_csv_table(data["csv"])
+        except csv.Error as e:  # 閉じられていないクォート等
+            return response_json(400, {
+                "response": {"summary": f"INVALID_CSV: {str(e)}", "key_insights": [], "recommendations": [], "data_analysis": {"total_records": 0}},
+                "format": "json", "message": "INVALID_CSV", "engine": "bedrock", "model": MODEL_ID
+            })
     # 最終フォールバック（稀に data/rows で来る場合）
     elif isinstance(data.get("rows"), list):
         sales = data["rows"]
     elif isinstance(data.get("data"), list):
         sales = data["data"]
 
-    columns = list(sales[0].keys()) if sales else []
+    # 列名はタプルのまま扱う（_score_columns等のキャッシュキーにそのまま使える）
+    columns: Tuple[str, ...] = ()
+    if csv_headers is not None:
+        if sales:
+            columns = csv_headers
+        sample = _rows_to_dicts(csv_headers, _sample_rows(sales, MAX_SAMPLE_ROWS))
+    else:
+        if sales:
+            columns = tuple(sales[0])
+        sample = _sample_rows(sales, MAX_SAMPLE_ROWS)
     total = len(sales)
+    if total > MAX_ROWS:
+        return response_json(413, {
+            "response": {"summary": f"データ件数が上限を超えています（{total}件 / 上限{MAX_ROWS}件）", "key_insights": [], "recommendations": [], "data_analysis": {"total_records": total}},
+            "format": "json", "message": "TOO_MANY_ROWS", "engine": "bedrock", "model": MODEL_ID
+        })
 
     # 分析タイプの決定（ユーザー指定を優先）
     if requested_analysis_type:
         # ユーザーが明示的に指定した分析タイプを使用
-        type_mapping = {
-            'sales': 'sales_data',
-            'hr': 'hr_data',
-            'marketing': 'marketing_data',
-            'inventory': 'inventory_data',
-            'customer': 'customer_data',
-            'financial': 'financial_data',
-            'strategic': 'financial_data'  # 統合戦略は財務分析として扱う
-        }
-        data_type = type_mapping.get(requested_analysis_type, 'financial_data')
+        data_type = _ANALYSIS_TYPE_MAPPING.get(requested_analysis_type, 'financial_data')
     else:
         # 分析タイプが指定されていない場合のみ自動判別
-        detected_data_type = _identify_data_type(columns, sales[:5] if sales else [])
+        detected_data_type = _identify_data_type(columns, sample[:5])
         data_type = detected_data_type
     
-    stats = _compute_stats(sales)
-    sample = sales[:50] if sales else []
+    # フロントエンドが列マッピングを指定している場合はその列を優先（未指定の役割は自動検出）
+    colmap = _sanitize_colmap(data.get("columnMapping"), columns)
+    stats = _compute_stats(sales, csv_headers, colmap)
 
     # データタイプ別プロンプト構築
-    if fmt == "markdown":
-        prompt = _build_prompt_markdown(stats, sample, data_type)
-    elif fmt == "text":
-        prompt = _build_prompt_text(stats, sample, data_type)
+    cache_prefix = ""
+    prompt_stats, prompt_sample = _prompt_inputs(stats, sample)
+    flat_builder = _FLAT_PROMPT_BUILDERS.get(fmt)
+    if flat_builder is not None:
+        prompt = flat_builder(prompt_stats, prompt_sample, data_type)
     else:
-        prompt = _build_prompt_json(stats, sample, data_type, industry)
+        prompt = _build_prompt_json(prompt_stats, prompt_sample, data_type, industry)
+        cache_prefix = _build_prompt_json_prefix(data_type, industry)
 
     # LLM call
     summary_ai = ""
@@ -1422,56 +2081,22 @@ def lambda_handler(event, context):
     trend = stats.get("timeseries", [])
 
     try:
-        ai_text = _bedrock_converse(MODEL_ID, REGION, prompt, industry)
         if fmt == "json":
-            # JSON想定。フェンス除去・部分抽出に軽く対応
-            text = ai_text.strip()
-            if text.startswith("```"):
-                # ```json ... ``` のケースを剥がす
-                text = text.strip("`").lstrip("json").strip()
-            try:
-                ai_json = json.loads(text)
-            except Exception:
-                # 最後の手段：先頭～末尾の最初の{}を探す
-                start = text.find("{"); end = text.rfind("}")
-                if start != -1 and end != -1 and end > start:
-                    try: ai_json = json.loads(text[start:end+1])
-                    except Exception: ai_json = {"overview": ai_text}
-                else:
-                    ai_json = {"overview": ai_text}
+            if SPLIT_SECTIONS:
+                ai_json = asyncio.run(_bedrock_converse_sections(prompt, industry, cache_prefix))
+            else:
+                ai_json = _parse_ai_json(_bedrock_converse(MODEL_ID, prompt, industry, cache_prefix))
             summary_ai = ai_json.get("overview", "")
             findings   = ai_json.get("findings", [])
             kpis       = ai_json.get("kpis", kpis)
             trend      = ai_json.get("trend", trend)
             action_plan = ai_json.get("action_plan", [])
         else:
-            summary_ai = ai_text
+            summary_ai = _bedrock_converse(MODEL_ID, prompt, industry, cache_prefix)
     except Exception as e:
         logger.exception("Bedrock error")
         summary_ai = f"(Bedrock error: {str(e)})"
 
-    # presentation_md for enhanced readability
-    def _fmt_yen(n):
-        try: return f"{int(n):,} 円"
-        except: return str(n)
-
-    # 自然な日本語レポート（presentation_md） - 記号除去
-    trend_list = stats.get('timeseries',[])[:3]
-    trend_text = ""
-    if trend_list:
-        trend_parts = []
-        for t in trend_list:
-            date = t.get('date','')
-            sales = t.get('sales',0)
-            if date and sales:
-                trend_parts.append(f"{date}に{int(sales):,}円")
-        trend_text = "、".join(trend_parts) if trend_parts else "データがありません"
-    
-    total_sales = stats.get('total_sales',0)
-    avg_sales = stats.get('avg_row_sales',0)
-    
-    presentation_md = f"""{total}件のデータを分析しました。売上合計は{int(total_sales):,}円で、1件あたり平均{int(avg_sales):,}円でした。主な売上は{trend_text}となっています。"""
-
     # 読みやすい体系的なレポート形式に整理
     if fmt == "markdown" or fmt == "text":
         # Markdown/Text形式は純粋な日本語のみ
@@ -1484,82 +2109,70 @@ def lambda_handler(event, context):
             "model": MODEL_ID
         }
     else:
+        # 自然な日本語レポート（presentation_md） - 記号除去
+        trend_list = stats.get('timeseries',[])[:3]
+        trend_text = ""
+        if trend_list:
+            trend_parts = []
+            for t in trend_list:
+                date = t.get('date','')
+                sales = t.get('sales',0)
+                if date and sales:
+                    trend_parts.append(f"{date}に{int(sales):,}円")
+            trend_text = "、".join(trend_parts) if trend_parts else "データがありません"
+
+        total_sales = int(stats.get('total_sales', 0))
+        avg_sales = int(stats.get('avg_row_sales', 0))
+        presentation_md = _PRESENTATION_TMPL.format(total=total, total_sales=total_sales, avg_sales=avg_sales, trend_text=trend_text)
+
         # 汎用的で読みやすいレポート形式（全分析タイプ対応）
 
         # 分析タイプ別のデータ表示設定
-        analysis_icons = {
-            'sales_data': {'icon': '💰', 'name': '売上分析', 'unit': '円', 'metric': '売上'},
-            'hr_data': {'icon': '👥', 'name': '人事分析', 'unit': '円', 'metric': '人件費'},
-            'marketing_data': {'icon': '📢', 'name': 'マーケティング分析', 'unit': '円', 'metric': 'ROI'},
-            'inventory_data': {'icon': '📦', 'name': '在庫分析', 'unit': '個', 'metric': '在庫'},
-            'customer_data': {'icon': '🎯', 'name': '顧客分析', 'unit': '円', 'metric': 'LTV'},
-            'financial_data': {'icon': '📊', 'name': '財務分析', 'unit': '円', 'metric': '損益'}
-        }
-
-        current_analysis = analysis_icons.get(data_type, analysis_icons['financial_data'])
+        current_analysis = _ANALYSIS_META.get(data_type, _ANALYSIS_META['financial_data'])
         analysis_icon = current_analysis['icon']
         analysis_name = current_analysis['name']
         unit = current_analysis['unit']
         metric_name = current_analysis['metric']
 
         # データ概要を分析タイプに応じて整理
-        data_overview = f"""
-{analysis_icon} {analysis_name} - データ概要
-• 分析対象: {total}件のデータ
-• 総{metric_name}: {int(stats.get('total_sales', 0)):,}{unit}
-• 平均{metric_name}: {int(stats.get('avg_row_sales', 0)):,}{unit}/件"""
+        data_overview = _DATA_OVERVIEW_TMPL.format(
+            icon=analysis_icon, name=analysis_name, total=total, metric=metric_name, unit=unit,
+            total_sales=total_sales, avg_sales=avg_sales
+        )
 
         # 主要項目を分析タイプに応じて整理
         top_items_text = ""
         if stats.get('top_products'):
             # 分析タイプ別のラベル設定
-            labels = {
-                'sales_data': '🏆 主要商品・売上実績',
-                'hr_data': '👑 高給与・人件費上位',
-                'marketing_data': '🎯 効果的キャンペーン・ROI上位',
-                'inventory_data': '📈 主要商品・在庫金額',
-                'customer_data': '💎 優良顧客・LTV上位',
-                'financial_data': '💼 主要項目・金額実績'
-            }
-
-            label = labels.get(data_type, labels['financial_data'])
-            top_items_text = f"\n\n{label}:"
-
-            for i, item in enumerate(stats['top_products'][:5], 1):
-                top_items_text += f"\n  {i}位. {item['name']}: {int(item['sales']):,}{unit}"
+            label = _TOP_ITEM_LABELS.get(data_type, _TOP_ITEM_LABELS['financial_data'])
+            parts = [f"\n\n{label}:"]
+            parts.extend(f"  {i}位. {item['name']}: {int(item['sales']):,}{unit}"
+                         for i, item in enumerate(stats['top_products'][:5], 1))
+            top_items_text = "\n".join(parts)
 
         # トレンドデータを分析タイプに応じて整理
         trend_data_text = ""
         if stats.get('timeseries'):
             # 分析タイプ別のトレンドラベル
-            trend_labels = {
-                'sales_data': '📈 売上推移',
-                'hr_data': '📊 人件費推移',
-                'marketing_data': '📉 ROI推移',
-                'inventory_data': '📦 在庫変動',
-                'customer_data': '👥 顧客価値推移',
-                'financial_data': '💹 財務指標推移'
-            }
-
-            trend_label = trend_labels.get(data_type, trend_labels['financial_data'])
-            trend_data_text = f"\n\n{trend_label} (直近データ):"
-
-            for trend_item in stats['timeseries'][:5]:
-                trend_data_text += f"\n  • {trend_item['date']}: {int(trend_item['sales']):,}{unit}"
+            trend_label = _TREND_LABELS.get(data_type, _TREND_LABELS['financial_data'])
+            parts = [f"\n\n{trend_label} (直近データ):"]
+            parts.extend(f"  • {trend_item['date']}: {int(trend_item['sales']):,}{unit}"
+                         for trend_item in stats['timeseries'][:5])
+            trend_data_text = "\n".join(parts)
 
         # アクションプランを整理
         action_plan_text = ""
         if 'action_plan' in locals() and action_plan:
-            action_plan_text = "\n\n🚀 実行アクションプラン:"
-            for i, action in enumerate(action_plan, 1):
-                action_plan_text += f"\n  {i}. {action}"
+            parts = ["\n\n🚀 実行アクションプラン:"]
+            parts.extend(f"  {i}. {action}" for i, action in enumerate(action_plan, 1))
+            action_plan_text = "\n".join(parts)
 
         # 重要な発見を整理
         insights_text = ""
         if findings:
-            insights_text = "\n\n💡 重要な発見:"
-            for i, insight in enumerate(findings, 1):
-                insights_text += f"\n  {i}. {insight}"
+            parts = ["\n\n💡 重要な発見:"]
+            parts.extend(f"  {i}. {insight}" for i, insight in enumerate(findings, 1))
+            insights_text = "\n".join(parts)
 
         # 全体を結合した読みやすいレポート
         structured_report = f"""{summary_ai}
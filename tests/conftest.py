@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+Lambda関数テストの共通設定
+"""
+
+import os
+import sys
+
+# Windows環境での文字エンコーディング設定
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(encoding="utf-8")
+
+# 環境変数設定（lambda_functionのインポート前に行う）
+os.environ.setdefault("BEDROCK_MODEL_ID", "us.deepseek.r1-v1:0")
+os.environ.setdefault("AWS_REGION", "us-east-1")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("MAX_TOKENS", "8000")
+os.environ.setdefault("TEMPERATURE", "0.15")
+
+# Lambdaコードをインポート可能にする
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda", "sap-claude-handler"))
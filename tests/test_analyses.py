@@ -0,0 +1,419 @@
+# -*- coding: utf-8 -*-
+"""
+分析タイプ別のLambda関数テスト（Bedrock呼び出しはモック）
+"""
+
+import base64
+import gzip
+import json
+from collections import OrderedDict
+
+import pytest
+
+import lambda_function
+
+# autouseフィクスチャでモックする前の実装（応答キャッシュのテスト用）
+_BEDROCK_CONVERSE = lambda_function._bedrock_converse
+
+STUB_AI_JSON = {
+    "overview": "スタブ分析結果",
+    "findings": ["発見1"],
+    "kpis": {"total_sales": 0, "top_products": []},
+    "trend": [],
+    "action_plan": ["施策1"]
+}
+
+# 分析タイプ別テストデータ
+TEST_DATA_SETS = {
+    "sales": [
+        {"日付": "2024-01-01", "商品名": "商品A", "売上金額": 50000, "数量": 10},
+        {"日付": "2024-01-02", "商品名": "商品B", "売上金額": 30000, "数量": 5},
+        {"日付": "2024-01-03", "商品名": "商品A", "売上金額": 75000, "数量": 15},
+        {"日付": "2024-01-04", "商品名": "商品C", "売上金額": 20000, "数量": 2},
+        {"日付": "2024-01-05", "商品名": "商品B", "売上金額": 45000, "数量": 9},
+        {"日付": "2024-01-06", "商品名": "商品A", "売上金額": 60000, "数量": 12},
+        {"日付": "2024-01-07", "商品名": "商品D", "売上金額": 80000, "数量": 8},
+    ],
+    "hr": [
+        {"社員ID": "E001", "氏名": "田中太郎", "部署": "営業部", "給与": 450000, "残業時間": 25},
+        {"社員ID": "E002", "氏名": "佐藤花子", "部署": "IT部", "給与": 520000, "残業時間": 15},
+        {"社員ID": "E003", "氏名": "山田次郎", "部署": "営業部", "給与": 380000, "残業時間": 35},
+        {"社員ID": "E004", "氏名": "鈴木美穂", "部署": "人事部", "給与": 420000, "残業時間": 10},
+        {"社員ID": "E005", "氏名": "高橋一郎", "部署": "IT部", "給与": 580000, "残業時間": 20},
+    ],
+    "inventory": [
+        {"商品コード": "P001", "商品名": "商品A", "在庫数": 150, "単価": 2500, "在庫金額": 375000},
+        {"商品コード": "P002", "商品名": "商品B", "在庫数": 80, "単価": 1800, "在庫金額": 144000},
+        {"商品コード": "P003", "商品名": "商品C", "在庫数": 200, "単価": 900, "在庫金額": 180000},
+        {"商品コード": "P004", "商品名": "商品D", "在庫数": 50, "単価": 5000, "在庫金額": 250000},
+        {"商品コード": "P005", "商品名": "商品E", "在庫数": 300, "単価": 600, "在庫金額": 180000},
+    ],
+    "marketing": [
+        {"キャンペーン": "Google広告", "予算": 500000, "クリック数": 2500, "CV数": 125, "ROI": 2.5},
+        {"キャンペーン": "Facebook広告", "予算": 300000, "クリック数": 1800, "CV数": 90, "ROI": 3.0},
+        {"キャンペーン": "YouTube広告", "予算": 400000, "クリック数": 1200, "CV数": 60, "ROI": 1.8},
+        {"キャンペーン": "LINE広告", "予算": 200000, "クリック数": 800, "CV数": 50, "ROI": 3.5},
+    ]
+}
+
+
+@pytest.fixture(autouse=True)
+def mock_bedrock(monkeypatch):
+    """実際のBedrockを呼ばず、送信されたプロンプトを記録してスタブ応答を返す"""
+    prompts = []
+
+    def _fake_converse(model_id, prompt, *args, **kwargs):
+        prompts.append(prompt)
+        return json.dumps(STUB_AI_JSON, ensure_ascii=False)
+
+    monkeypatch.setattr(lambda_function, "_bedrock_converse", _fake_converse)
+    return prompts
+
+
+def _event(payload, method="POST", headers=None):
+    return {
+        "httpMethod": method,
+        "headers": headers or {},
+        "body": json.dumps(payload, ensure_ascii=False),
+        "requestContext": {"http": {"method": method}}
+    }
+
+
+def _invoke(payload, **kwargs):
+    result = lambda_function.lambda_handler(_event(payload, **kwargs), {})
+    return result["statusCode"], json.loads(result["body"])
+
+
+@pytest.mark.parametrize("analysis_type,data_type", [
+    ("sales", "sales_data"),
+    ("hr", "hr_data"),
+    ("inventory", "inventory_data"),
+    ("marketing", "marketing_data"),
+])
+def test_json_analysis(analysis_type, data_type, mock_bedrock):
+    """分析タイプ別のJSONレポートの構成を確認"""
+    data = TEST_DATA_SETS[analysis_type]
+    status, body = _invoke({"salesData": data, "analysisType": analysis_type, "responseFormat": "json"})
+
+    assert status == 200
+    assert body["format"] == "json"
+    report = body["response"]["summary_ai"]
+    assert report.startswith(STUB_AI_JSON["overview"])
+    assert lambda_function._ANALYSIS_META[data_type]["name"] in report
+    assert f"分析対象: {len(data)}件のデータ" in report
+    assert "施策1" in report and "発見1" in report
+    assert body["response"]["presentation_md"].startswith(f"{len(data)}件のデータを分析しました。")
+    assert len(mock_bedrock) == 1
+
+
+# 在庫データは商品名・単価の売上系キーワードが優勢で売上データと判定されるため、analysisTypeの明示が前提
+@pytest.mark.parametrize("analysis_type", ["sales", "hr", "marketing"])
+def test_detects_data_type_without_analysis_type(analysis_type):
+    """分析タイプ未指定時は列名・サンプルからデータタイプを自動判別"""
+    data = TEST_DATA_SETS[analysis_type]
+    assert lambda_function._identify_data_type(list(data[0]), data[:5]) == f"{analysis_type}_data"
+
+
+@pytest.mark.parametrize("fmt", ["markdown", "text"])
+def test_flat_formats_return_model_text(fmt, mock_bedrock):
+    """Markdown/Text形式はモデル出力をそのまま返す"""
+    status, body = _invoke({"salesData": TEST_DATA_SETS["sales"], "responseFormat": fmt})
+
+    assert status == 200
+    assert body["format"] == fmt
+    assert json.loads(body["response"]["summary_ai"]) == STUB_AI_JSON
+    assert "presentation_md" not in body["response"]
+
+
+def test_csv_input_matches_sales_data():
+    """CSV入力はsalesDataと同じ集計結果になる"""
+    rows = TEST_DATA_SETS["sales"]
+    csv_text = "\n".join(["日付,商品名,売上金額,数量"] + [f"{r['日付']},{r['商品名']},{r['売上金額']},{r['数量']}" for r in rows])
+    headers, table = lambda_function._parse_csv_table(csv_text)
+
+    assert lambda_function._compute_stats(table, headers) == lambda_function._compute_stats(rows)
+
+    status, body = _invoke({"csv": csv_text, "analysisType": "sales"})
+    assert status == 200
+    assert "総売上: 360,000円" in body["response"]["summary_ai"]
+
+
+@pytest.mark.parametrize("method,status", [("OPTIONS", 200), ("GET", 405)])
+def test_http_methods(method, status):
+    result = lambda_function.lambda_handler(_event({}, method=method), {})
+    assert result["statusCode"] == status
+
+
+def test_invalid_json_returns_400():
+    event = _event({})
+    event["body"] = "{"
+    result = lambda_function.lambda_handler(event, {})
+    assert result["statusCode"] == 400
+    assert json.loads(result["body"])["message"] == "INVALID_JSON"
+
+
+def test_too_many_rows_returns_413(monkeypatch, mock_bedrock):
+    monkeypatch.setattr(lambda_function, "MAX_ROWS", 3)
+    status, body = _invoke({"salesData": TEST_DATA_SETS["sales"], "analysisType": "sales"})
+
+    assert status == 413
+    assert body["message"] == "TOO_MANY_ROWS"
+    assert mock_bedrock == []
+
+
+@pytest.mark.parametrize("value,expected", [
+    (" ¥1,000円 ", 1000.0),
+    ("\t1,200\n", 1200.0),
+    ("1 000", 0.0),  # 値の途中の空白は除去しない（数値として解釈できない）
+    (500, 500.0),
+    ("abc", 0.0),
+    (10 ** 400, float("inf")),  # floatの範囲外の整数（標準jsonで解析された場合）も例外にしない
+])
+def test_to_number(value, expected):
+    """通貨記号・桁区切りと前後の空白のみ無視して数値化"""
+    assert lambda_function._to_number(value) == expected
+
+
+@pytest.mark.parametrize("cap", [1, 2, 3, 5, 30])
+def test_sample_rows_keeps_head_within_cap(cap):
+    """上限を超える場合も先頭行を必ず含み、件数は上限以内"""
+    rows = list(range(100))
+    sample = lambda_function._sample_rows(rows, cap)
+
+    assert len(sample) == cap
+    assert sample[0] == 0
+    assert sample == sorted(set(sample))
+    if cap >= 5:
+        assert sample[-1] == 99
+
+
+def test_sample_rows_returns_all_rows_within_cap():
+    rows = [{"a": i} for i in range(5)]
+    assert lambda_function._sample_rows(rows, 5) == rows
+    assert lambda_function._sample_rows(rows, 30) == rows
+    assert lambda_function._sample_rows([], 30) == []
+
+
+def _large_response():
+    return lambda_function.response_json(200, {"summary": "分析結果" * 200})
+
+
+def test_gzip_disabled_by_default():
+    resp = _large_response()
+    assert lambda_function._gzip_response(resp, "gzip, deflate") is resp
+
+
+@pytest.mark.parametrize("accept_encoding,compressed", [
+    ("gzip, deflate, br", True),
+    ("GZIP", True),
+    ("deflate, br", False),
+    ("", False),
+])
+def test_gzip_negotiates_accept_encoding(monkeypatch, accept_encoding, compressed):
+    monkeypatch.setattr(lambda_function, "GZIP_RESPONSES", True)
+    resp = _large_response()
+    result = lambda_function._gzip_response(resp, accept_encoding)
+
+    if not compressed:
+        assert result is resp
+        return
+    assert result["isBase64Encoded"] is True
+    assert result["headers"]["Content-Encoding"] == "gzip"
+    assert result["headers"]["Vary"] == "Accept-Encoding"
+    assert result["headers"]["Content-Type"] == resp["headers"]["Content-Type"]
+    assert gzip.decompress(base64.b64decode(result["body"])).decode("utf-8") == resp["body"]
+    assert "Content-Encoding" not in resp["headers"]  # 元のレスポンスは変更しない
+
+
+def test_gzip_skips_small_and_base64_bodies(monkeypatch):
+    monkeypatch.setattr(lambda_function, "GZIP_RESPONSES", True)
+    small = lambda_function.response_json(200, {"ok": True})
+    assert len(small["body"].encode("utf-8")) < lambda_function._GZIP_MIN_BYTES
+    assert lambda_function._gzip_response(small, "gzip") is small
+
+    encoded = dict(_large_response(), isBase64Encoded=True)
+    assert lambda_function._gzip_response(encoded, "gzip") is encoded
+
+
+def test_handler_gzips_large_reports_when_enabled(monkeypatch):
+    monkeypatch.setattr(lambda_function, "GZIP_RESPONSES", True)
+    payload = {"salesData": TEST_DATA_SETS["sales"], "analysisType": "sales"}
+    result = lambda_function.lambda_handler(_event(payload, headers={"Accept-Encoding": "gzip"}), {})
+
+    assert result["statusCode"] == 200
+    assert result["headers"]["Content-Encoding"] == "gzip"
+    body = json.loads(gzip.decompress(base64.b64decode(result["body"])))
+    assert body["response"]["summary_ai"].startswith(STUB_AI_JSON["overview"])
+
+
+@pytest.mark.parametrize("content_type,mime", [
+    ("image/png", "image/png"),
+    ("Image/PNG", "image/png"),
+    ("image/jpeg; charset=binary", "image/jpeg"),
+    ("application/pdf", "application/pdf"),
+])
+def test_raw_document_upload(monkeypatch, content_type, mime):
+    """対応形式の直接アップロードはContent-Typeの大小文字・パラメータによらず画像分析に回す"""
+    calls = []
+    monkeypatch.setattr(lambda_function, "_image_analysis_response",
+                        lambda images, analysis_type, *args: calls.append((images, analysis_type)) or {"statusCode": 200})
+    event = {
+        "headers": {"Content-Type": content_type},
+        "isBase64Encoded": True,
+        "body": base64.b64encode(b"%PDF-raw").decode("ascii"),
+        "requestContext": {"http": {"method": "POST"}}
+    }
+
+    assert lambda_function.lambda_handler(event, {})["statusCode"] == 200
+    assert calls == [([(b"%PDF-raw", mime)], "document")]
+
+
+@pytest.fixture
+def converse_calls(monkeypatch):
+    """応答キャッシュを空にし、キャッシュ下のBedrock呼び出しを記録してプロンプトごとの応答を返す"""
+    calls = []
+
+    def _fake_uncached(model_id, prompt, industry="general", cache_prefix=""):
+        calls.append(prompt)
+        return f"応答:{prompt}:{len(calls)}"
+
+    monkeypatch.setattr(lambda_function, "_RESPONSE_CACHE", OrderedDict())
+    monkeypatch.setattr(lambda_function, "_bedrock_converse_uncached", _fake_uncached)
+    return calls
+
+
+def test_response_cache_disabled_by_default(converse_calls):
+    assert lambda_function._RESPONSE_CACHE_SIZE == 0
+    assert _BEDROCK_CONVERSE("m", "p") != _BEDROCK_CONVERSE("m", "p")
+    assert converse_calls == ["p", "p"]
+    assert not lambda_function._RESPONSE_CACHE
+
+
+def test_response_cache_hits_and_misses(monkeypatch, converse_calls):
+    monkeypatch.setattr(lambda_function, "_RESPONSE_CACHE_SIZE", 8)
+
+    first = _BEDROCK_CONVERSE("m", "p")
+    assert _BEDROCK_CONVERSE("m", "p") == first  # 同一プロンプトはキャッシュヒット
+    assert _BEDROCK_CONVERSE("m", "q") != first  # プロンプト違い
+    assert _BEDROCK_CONVERSE("m", "p", "retail") != first  # 業種違い
+    assert _BEDROCK_CONVERSE("other", "p") != first  # モデル違い
+    assert converse_calls == ["p", "q", "p", "p"]
+
+
+def test_response_cache_evicts_least_recently_used(monkeypatch, converse_calls):
+    monkeypatch.setattr(lambda_function, "_RESPONSE_CACHE_SIZE", 2)
+
+    _BEDROCK_CONVERSE("m", "a")
+    _BEDROCK_CONVERSE("m", "b")
+    _BEDROCK_CONVERSE("m", "a")  # aを最近使用に更新
+    _BEDROCK_CONVERSE("m", "c")  # 最も古いbを追い出す
+    assert len(lambda_function._RESPONSE_CACHE) == 2
+
+    _BEDROCK_CONVERSE("m", "a")
+    _BEDROCK_CONVERSE("m", "b")
+    assert converse_calls == ["a", "b", "c", "b"]
+
+
+def test_response_cache_skips_empty_responses(monkeypatch):
+    monkeypatch.setattr(lambda_function, "_RESPONSE_CACHE", OrderedDict())
+    monkeypatch.setattr(lambda_function, "_RESPONSE_CACHE_SIZE", 8)
+    monkeypatch.setattr(lambda_function, "_bedrock_converse_uncached", lambda *args: "")
+
+    assert _BEDROCK_CONVERSE("m", "p") == ""
+    assert not lambda_function._RESPONSE_CACHE
+
+
+@pytest.fixture
+def ocr_calls(monkeypatch, tmp_path):
+    """OCRキャッシュを一時ディレクトリに向け、Textract呼び出しを記録する"""
+    calls = []
+
+    def _fake_extract(textract, image_bytes, mime_type=""):
+        calls.append(image_bytes)
+        return "請求書\n合計 1000円"
+
+    monkeypatch.setattr(lambda_function, "_OCR_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(lambda_function, "_OCR_CACHE", OrderedDict())
+    monkeypatch.setattr(lambda_function, "_extract_text_lines", _fake_extract)
+    return calls
+
+
+def test_ocr_cache_writes_file_atomically(ocr_calls, tmp_path, monkeypatch):
+    assert lambda_function._textract_cached(None, b"img") == "請求書\n合計 1000円"
+    assert [p.suffix for p in tmp_path.iterdir()] == [".txt"]  # 一時ファイルは残らない
+
+    # メモリキャッシュが空でも/tmpのファイルから復元する
+    monkeypatch.setattr(lambda_function, "_OCR_CACHE", OrderedDict())
+    assert lambda_function._textract_cached(None, b"img") == "請求書\n合計 1000円"
+    assert ocr_calls == [b"img"]
+
+
+def test_ocr_cache_treats_empty_file_as_miss(ocr_calls, tmp_path):
+    key = lambda_function.hashlib.sha256(b"img").hexdigest()
+    (tmp_path / f"{key}.txt").write_text("", encoding="utf-8")  # 書き込み途中で読まれたファイル相当
+
+    assert lambda_function._textract_cached(None, b"img") == "請求書\n合計 1000円"
+    assert ocr_calls == [b"img"]
+    assert (tmp_path / f"{key}.txt").read_text(encoding="utf-8") == "請求書\n合計 1000円"
+
+
+def test_compute_stats_accepts_integers_beyond_float_range():
+    """標準jsonで解析された巨大な整数でも集計が例外にならない"""
+    rows = lambda_function._loads('[{"商品名": "A", "売上金額": 1%s}]' % ("0" * 400))
+    assert lambda_function._compute_stats(rows)["total_sales"] == float("inf")
+
+
+def test_malformed_csv_returns_400(mock_bedrock):
+    """閉じられていないクォートでフィールド長の上限を超えるCSVは400"""
+    limit = lambda_function.csv.field_size_limit()
+    status, body = _invoke({"csv": '日付,商品名\n2024-01-01,"' + "x" * (limit + 1)})
+
+    assert status == 400
+    assert body["message"] == "INVALID_CSV"
+    assert mock_bedrock == []
+
+
+def test_split_sections_takes_keys_from_their_own_section(monkeypatch):
+    """各セクションの担当キーのみを採用し、解析失敗時のフォールバックが他セクションを上書きしない"""
+    responses = {
+        "overview": "JSONではない応答",
+        "action_plan": json.dumps({"overview": "範囲外", "action_plan": ["施策A"]}, ensure_ascii=False),
+    }
+
+    def _fake_converse(model_id, prompt, *args, **kwargs):
+        return responses["action_plan" if "action_plan のみ" in prompt else "overview"]
+
+    monkeypatch.setattr(lambda_function, "_bedrock_converse", _fake_converse)
+    merged = lambda_function.asyncio.run(lambda_function._bedrock_converse_sections("分析して"))
+
+    assert merged["action_plan"] == ["施策A"]
+    assert merged["overview"] != "範囲外"
+    assert "findings" not in merged
+
+
+def test_partial_column_mapping_detects_remaining_roles():
+    """列マッピングの一部のみ指定された場合、残りの役割は列名から自動検出する"""
+    columns = ("日付", "商品名", "数量", "売上金額")
+    rows = [("2024-01-01", "A", "10", "500"), ("2024-01-02", "B", "3", "300")]
+    colmap = lambda_function._sanitize_colmap({"sales": "数量"}, columns)
+
+    assert colmap == {"date": "日付", "sales": "数量", "product": "商品名"}
+    assert lambda_function._detect_columns_by_headers(columns)["sales"] == "売上金額"
+    stats = lambda_function._compute_stats(rows, columns, colmap)
+    assert stats["total_sales"] == 13.0
+    assert stats["top_products"] and stats["timeseries"]
+
+
+@pytest.mark.parametrize("payload,checked", [
+    ({"rows": TEST_DATA_SETS["sales"], "action": "analyze"}, False),
+    ({"data": TEST_DATA_SETS["sales"], "action": "analyze"}, False),
+    ({"action": "created", "data": {"issue": {"title": "Error"}}}, True),
+])
+def test_sentry_detection_skipped_for_analysis_inputs(monkeypatch, payload, checked):
+    """rows/data（配列）を含む分析リクエストはSentry判定を省略し、dictのdataを持つSentryペイロードは判定する"""
+    calls = []
+    monkeypatch.setattr(lambda_function, "process_sentry_webhook", lambda data, hook: calls.append(data))
+    status, _ = _invoke(payload)
+
+    assert status == 200
+    assert bool(calls) is checked